@@ -0,0 +1,82 @@
+# chunking.py
+"""
+Streaming, token-aware chunker.
+
+Lines are packed into chunks of up to `max_tokens` model tokens, in a single
+pass over any iterable of text (a string, a list of pages, a generator).
+Boundaries are respected in this order of preference:
+- a section boundary line (e.g. `=== PAGE 2/5 ===`) always starts a new chunk
+- lines (paragraphs / list items) are kept whole when they fit
+- over-long lines are split at sentence ends
+- only a sentence longer than the whole budget is hard-split by tokens
+"""
+
+import re
+from typing import Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+
+from tokens import count_tokens, split_tokens
+
+CHUNK_TOKENS = 1600  # roughly the old 1200-word chunks
+PAGE_BOUNDARY = re.compile(r"^=== PAGE \d+/\d+ ===$")
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+
+
+def _iter_lines(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    if isinstance(source, str):
+        source = (source,)
+    for piece in source:
+        yield from piece.splitlines()
+
+
+def _units(line: str, max_tokens: int) -> Iterator[Tuple[str, int]]:
+    """Yield (text, tokens) pieces of one line, each within the budget."""
+    tokens = count_tokens(line)
+    if tokens <= max_tokens:
+        yield line, tokens
+        return
+    for sentence in _SENTENCE_END.split(line):
+        tokens = count_tokens(sentence)
+        if tokens <= max_tokens:
+            yield sentence, tokens
+        else:
+            for piece in split_tokens(sentence, max_tokens):
+                yield piece, count_tokens(piece)
+
+
+def iter_chunks(
+    source: Union[str, Iterable[str]],
+    max_tokens: int = CHUNK_TOKENS,
+    boundary: Optional[Pattern] = PAGE_BOUNDARY,
+) -> Iterator[str]:
+    """Yield chunks of at most `max_tokens` tokens from `source`."""
+    parts: List[str] = []
+    used = 0
+
+    for line in _iter_lines(source):
+        line = line.strip()
+        if not line:
+            continue
+        if boundary and parts and boundary.match(line):
+            yield "".join(parts).strip()
+            parts, used = [], 0
+
+        separator = "\n"  # sentences split off the same line are re-joined with a space
+        for text, tokens in _units(line, max_tokens):
+            if parts and used + tokens > max_tokens:
+                yield "".join(parts).strip()
+                parts, used = [], 0
+            parts.append(separator + text)
+            used += tokens
+            separator = " "
+
+    if parts:
+        yield "".join(parts).strip()
+
+
+def chunk_text(
+    text: Union[str, Iterable[str]],
+    max_tokens: int = CHUNK_TOKENS,
+    boundary: Optional[Pattern] = PAGE_BOUNDARY,
+) -> List[str]:
+    """Split text into chunks of at most `max_tokens` tokens."""
+    return list(iter_chunks(text, max_tokens, boundary))
@@ -0,0 +1,171 @@
+# llm_cache.py
+"""
+Content-addressed cache for LLM responses.
+
+A response is stored under the SHA-256 of (model, temperature, full message
+list), so the exact same prompt sent again is answered from disk instead of
+another round trip. Backed by SQLite with LRU eviction by entry count and
+total size.
+
+Set LLM_CACHE_DISABLE=1 (or pass bypass=True) to always call the model.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+DEFAULT_PATH = os.path.join(CACHE_DIR, "llm.sqlite")
+DEFAULT_MAX_ENTRIES = 20_000
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024  # 100 MB of responses
+
+
+def _normalize_messages(messages: Any) -> List[Dict[str, str]]:
+    """
+    Turn a prompt into a canonical list of {role, content} dicts.
+    Accepts a plain string, LangChain messages, or role/content dicts.
+    """
+    if isinstance(messages, str):
+        return [{"role": "user", "content": messages}]
+    normalized = []
+    for m in messages:
+        if isinstance(m, dict):
+            normalized.append({"role": str(m.get("role", "user")), "content": str(m.get("content", ""))})
+        else:
+            normalized.append({"role": getattr(m, "type", "user"), "content": str(m.content)})
+    return normalized
+
+
+def cache_key(model: str, temperature: Optional[float], messages: Any) -> str:
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "messages": _normalize_messages(messages)},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed LLM response cache with LRU eviction and hit/miss counters."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        enabled: Optional[bool] = None,
+    ):
+        if enabled is None:
+            enabled = os.getenv("LLM_CACHE_DISABLE", "").lower() not in {"1", "true", "yes"}
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key         TEXT PRIMARY KEY,
+                model       TEXT NOT NULL,
+                response    TEXT NOT NULL,
+                created_at  REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size        INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(accessed_at)")
+        self._conn.commit()
+
+    def get(self, model: str, temperature: Optional[float], messages: Any) -> Optional[str]:
+        key = cache_key(model, temperature, messages)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return row[0]
+
+    def put(self, model: str, temperature: Optional[float], messages: Any, response: str) -> None:
+        key = cache_key(model, temperature, messages)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, now, now, len(response.encode("utf-8"))),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def discard(self, model: str, temperature: Optional[float], messages: Any) -> None:
+        """Forget a cached response (e.g. one that turned out to be unusable)."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key = ?", (cache_key(model, temperature, messages),)
+            )
+            self._conn.commit()
+
+    def cached_call(
+        self,
+        model: str,
+        temperature: Optional[float],
+        messages: Any,
+        call: Callable[[], str],
+        bypass: bool = False,
+    ) -> str:
+        """Return the cached response for this prompt, or run `call()` and cache it."""
+        if not self.enabled or bypass:
+            return call()
+        cached = self.get(model, temperature, messages)
+        if cached is not None:
+            return cached
+        response = call()
+        if response:  # never cache empty completions
+            self.put(model, temperature, messages, response)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def _evict(self) -> None:
+        """Drop least recently used responses until both limits are met."""
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        stale = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+
+LLM_CACHE = LLMCache()
@@ -0,0 +1,103 @@
+# summarizing.py
+"""
+Map-reduce summarization.
+
+Map:    every chunk is summarized in parallel (bounded thread pool).
+Reduce: summaries are packed into groups that fit a token budget and each
+        group is merged in parallel; this repeats level by level until a
+        single summary remains, so latency grows with log(N) instead of N.
+        Summaries longer than half the budget are clipped first, so any two
+        fit together and no merge prompt ever exceeds the budget.
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from tokens import count_tokens, split_tokens
+from tracing import TRACER
+
+MAX_CONCURRENCY = 4       # simultaneous LLM calls
+REDUCE_TOKEN_BUDGET = 6000  # max tokens of summaries merged in one call
+
+
+def pack_groups(summaries: List[str], token_budget: int) -> List[List[str]]:
+    """
+    Greedily pack consecutive summaries into groups of at most
+    `token_budget` tokens. Each summary is clipped to half the budget, so
+    every closed group holds at least two; a leftover last summary joins
+    the previous group if it fits and otherwise stays on its own.
+    """
+    limit = max(1, token_budget // 2 - 1)  # one token per summary for the newline that joins them
+    groups: List[List[str]] = []
+    current: List[str] = []
+    used = last_used = 0
+    for summary in summaries:
+        if count_tokens(summary) > limit:
+            summary = split_tokens(summary, limit)[0]
+        size = count_tokens(summary) + 1
+        if current and used + size > token_budget:
+            groups.append(current)
+            current, used, last_used = [], 0, used
+        current.append(summary)
+        used += size
+    if current:
+        if len(current) == 1 and groups and last_used + used <= token_budget:
+            groups[-1].append(current[0])
+        else:
+            groups.append(current)
+    return groups
+
+
+def _map(pool: ThreadPoolExecutor, fn: Callable, items: List) -> List:
+    """pool.map that runs each call in a copy of the caller's context (trace id)."""
+    futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [f.result() for f in futures]
+
+
+def reduce_summaries(
+    summaries: List[str],
+    merge: Callable[[str], str],
+    pool: ThreadPoolExecutor,
+    token_budget: int = REDUCE_TOKEN_BUDGET,
+    log: Callable[[str], None] = print,
+) -> str:
+    """Tree-merge `summaries` level by level on `pool` until one remains."""
+    level = summaries
+    depth = 1
+    while True:
+        groups = pack_groups(level, token_budget)
+        log(f"   → Reduce level {depth}: merging {len(level)} summaries in {len(groups)} group(s)")
+        with TRACER.span("reduce", summaries=len(level), groups=len(groups)):
+            # A lone leftover summary moves up a level unmerged, unless it is all there is
+            level = _map(
+                pool,
+                lambda group: merge("\n".join(group)) if len(group) > 1 or len(groups) == 1 else group[0],
+                groups,
+            )
+        if len(level) == 1:
+            return level[0]
+        depth += 1
+
+
+def map_reduce_summarize(
+    chunks: List[str],
+    summarize_chunk: Callable[[str], str],
+    merge: Callable[[str], str],
+    max_concurrency: int = MAX_CONCURRENCY,
+    token_budget: int = REDUCE_TOKEN_BUDGET,
+    log: Callable[[str], None] = print,
+) -> str:
+    """
+    Summarize `chunks` into one text.
+
+    `summarize_chunk(chunk)` produces one chunk summary and
+    `merge(joined_summaries)` merges newline-joined summaries into one.
+    """
+    if not chunks:
+        return ""
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        log(f"   → Summarizing {len(chunks)} chunks ({max_concurrency} at a time)")
+        summaries = _map(pool, summarize_chunk, chunks)
+        return reduce_summaries(summaries, merge, pool, token_budget, log)
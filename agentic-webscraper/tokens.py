@@ -0,0 +1,32 @@
+# tokens.py
+"""
+Token counting shared by the chunking and summarization stages.
+
+Uses tiktoken when it is installed; otherwise falls back to the usual
+~4 characters per token estimate.
+"""
+
+from typing import List
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("o200k_base")  # gpt-4o family
+except Exception:  # pragma: no cover - tiktoken missing or offline
+    _ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    """Number of model tokens in `text` (estimated without tiktoken)."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def split_tokens(text: str, max_tokens: int) -> List[str]:
+    """Hard-split `text` into pieces of at most `max_tokens` tokens each."""
+    if _ENCODING is not None:
+        ids = _ENCODING.encode(text, disallowed_special=())
+        return [_ENCODING.decode(ids[i:i + max_tokens]) for i in range(0, len(ids), max_tokens)]
+    step = max_tokens * 4
+    return [text[i:i + step] for i in range(0, len(text), step)]
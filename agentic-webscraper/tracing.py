@@ -0,0 +1,188 @@
+# tracing.py
+"""
+Lightweight tracing and metrics for the deep-scrape pipelines.
+
+    with TRACER.span("fetch", url=url) as span:
+        ...
+        span.set(bytes=n, cache="miss")
+
+Every finished span (name, wall-clock start, duration, attributes, error)
+is handed to each registered sink. Two sinks ship here:
+- Collector: keeps recent spans in memory and aggregates them into a
+  per-stage report (count, errors, p50/p95 latency, summed counters)
+- JsonlSink: appends one JSON object per span to a file
+
+Any callable taking a Span can be added with TRACER.add_sink(). Setting
+TRACE_FILE=/path/to/spans.jsonl enables the JSONL sink at import time.
+
+Spans opened inside `TRACER.trace(...)` share its trace_id, so all spans of
+one request can be grouped. The id lives in a contextvar; worker threads
+started with `contextvars.copy_context().run` inherit it.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+import numpy as np
+
+SPANS_PER_NAME = 2000  # recent spans kept per name by the Collector
+
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_id", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    start: float                      # wall clock (time.time())
+    duration: float = 0.0             # seconds
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    trace_id: Optional[str] = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def add(self, key: str, amount: float = 1) -> None:
+        """Increment a numeric attribute."""
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+
+Sink = Callable[[Span], None]
+
+
+# =========================
+# Sinks
+# =========================
+class Collector:
+    """In-process sink that aggregates spans into a per-name report."""
+
+    def __init__(self, spans_per_name: int = SPANS_PER_NAME):
+        self._spans: Dict[str, Deque[Span]] = defaultdict(lambda: deque(maxlen=spans_per_name))
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span) -> None:
+        with self._lock:
+            self._spans[span.name].append(span)
+
+    def spans(self, name: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            if name is not None:
+                return list(self._spans.get(name, ()))
+            return [s for spans in self._spans.values() for s in spans]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per span name: count, errors, p50/p95/total seconds, and the sum of
+        every numeric (or boolean) attribute, e.g. bytes, tokens, cache hits.
+        """
+        with self._lock:
+            groups = {name: list(spans) for name, spans in self._spans.items() if spans}
+        report = {}
+        for name, spans in sorted(groups.items()):
+            durations = np.array([s.duration for s in spans])
+            totals: Dict[str, float] = defaultdict(float)
+            for s in spans:
+                for key, value in s.attrs.items():
+                    if isinstance(value, (bool, int, float)):
+                        totals[key] += value
+            report[name] = {
+                "count": len(spans),
+                "errors": sum(1 for s in spans if s.error),
+                "p50": float(np.percentile(durations, 50)),
+                "p95": float(np.percentile(durations, 95)),
+                "total": float(durations.sum()),
+                **{key: round(value, 3) for key, value in totals.items()},
+            }
+        return report
+
+
+class JsonlSink:
+    """Appends each span as one JSON line."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span) -> None:
+        line = json.dumps(asdict(span), default=str, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+# =========================
+# Tracer
+# =========================
+class Tracer:
+    def __init__(self, sinks: Optional[List[Sink]] = None):
+        self.sinks: List[Sink] = list(sinks or [])
+
+    def add_sink(self, sink: Sink) -> None:
+        self.sinks.append(sink)
+
+    def _emit(self, span: Span) -> None:
+        for sink in self.sinks:
+            try:
+                sink(span)
+            except Exception:  # a broken sink must never break the pipeline
+                pass
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        """Time the block; an exception is recorded on the span and re-raised."""
+        span = Span(name, time.time(), attrs=dict(attrs), trace_id=_trace_id.get())
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            self._emit(span)
+
+    def record(self, name: str, duration: float, **attrs: Any) -> None:
+        """Emit a span whose duration was measured elsewhere (e.g. accumulated)."""
+        self._emit(Span(name, time.time() - duration, duration, dict(attrs), trace_id=_trace_id.get()))
+
+    @contextmanager
+    def trace(self, name: str, **attrs: Any) -> Iterator[Span]:
+        """Root span: every span opened inside it shares its trace_id."""
+        token = _trace_id.set(uuid.uuid4().hex[:16])
+        try:
+            with self.span(name, **attrs) as span:
+                yield span
+        finally:
+            _trace_id.reset(token)
+
+
+def format_report(report: Dict[str, Dict[str, Any]]) -> str:
+    """Render Collector.report() as a fixed-width table."""
+    lines = [f"{'stage':<16}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}  counters"]
+    for name, row in report.items():
+        counters = ", ".join(
+            f"{k}={v:g}" for k, v in row.items() if k not in {"count", "errors", "p50", "p95", "total"}
+        )
+        lines.append(
+            f"{name:<16}{row['count']:>7}{row['errors']:>8}"
+            f"{row['p50'] * 1000:>10.1f}{row['p95'] * 1000:>10.1f}{row['total']:>10.2f}  {counters}"
+        )
+    return "\n".join(lines)
+
+
+COLLECTOR = Collector()
+TRACER = Tracer([COLLECTOR])
+if os.getenv("TRACE_FILE"):
+    TRACER.add_sink(JsonlSink(os.environ["TRACE_FILE"]))
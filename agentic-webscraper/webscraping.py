@@ -1,14 +1,21 @@
 # deep_scrape_chatbot_memoryless.py
 import os
-import requests
-from typing import List
+from typing import Dict, List
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 from ddgs import DDGS
 
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 
+from chunking import chunk_text
+from dedup import DedupReport, drop_near_duplicates, drop_repeated_lines
+from fetching import fetch_all, fetch_text
+from llm_cache import LLM_CACHE
+from search_cache import cached_search
+from summarizing import map_reduce_summarize
+from tokens import count_tokens
+from tracing import COLLECTOR, TRACER, format_report
+
 # =========================
 # Env & model
 # =========================
@@ -17,54 +24,59 @@ api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise ValueError("OPENAI_API_KEY not found in .env file")
 
+MODEL_NAME = "gpt-4o-mini"
+TEMPERATURE = 0.2
+
 llm = ChatOpenAI(
-    model="gpt-4o-mini",
+    model=MODEL_NAME,
     api_key=api_key,
-    temperature=0.2,
+    temperature=TEMPERATURE,
 )
 
 # =========================
 # Scraping function
 # =========================
+def format_text(blocks: Dict[str, List[str]]) -> str:
+    """Join extracted headlines, paragraphs and list items"""
+    # One block per line so repeated boilerplate lines can be dropped later;
+    # iter_chunks keeps these line breaks, so each block stays on its own line in the prompt.
+    headlines = "\n".join(blocks["headlines"])
+    paragraphs = "\n".join(blocks["article"])
+    list_items = "\n".join(blocks["list_items"])
+    return f"{headlines}\n{paragraphs}\n{list_items}"
+
 def scrape_page(url: str) -> str:
     """Scrape textual content from one webpage"""
     try:
-        resp = requests.get(
+        return fetch_text(
             url,
+            format_text,
             timeout=10,
             headers={"User-Agent": "Mozilla/5.0"},
+            separator=" ",
         )
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        headlines = " ".join([h.get_text(" ", strip=True) for h in soup.find_all(["h1","h2","h3"])])
-        paragraphs = " ".join([p.get_text(" ", strip=True) for p in soup.find_all("p")])
-        list_items = " ".join([li.get_text(" ", strip=True) for li in soup.find_all("li")])
-        return f"{headlines}\n{paragraphs}\n{list_items}"
-
     except Exception as e:
         print(f"❌ Error scraping {url}: {e}")
         return ""
 
-# =========================
-# Chunking
-# =========================
-def chunk_text(text: str, max_len: int = 3000) -> List[str]:
-    """Split text into smaller chunks (approx by words)"""
-    words = text.split()
-    chunks, curr = [], []
-    for w in words:
-        curr.append(w)
-        if len(curr) >= max_len:
-            chunks.append(" ".join(curr))
-            curr = []
-    if curr:
-        chunks.append(" ".join(curr))
-    return chunks
-
 # =========================
 # Summarization with LLM
 # =========================
+def complete(span_name: str, prompt: str) -> str:
+    """One cached LLM call, traced with token counts and cache outcome"""
+    messages = [HumanMessage(content=prompt)]
+    called = False
+
+    def call() -> str:
+        nonlocal called
+        called = True
+        return llm.invoke(messages).content
+
+    with TRACER.span(span_name, model=MODEL_NAME) as span:
+        text = LLM_CACHE.cached_call(MODEL_NAME, TEMPERATURE, messages, call)
+        span.set(cache_hit=not called, tokens_in=count_tokens(prompt), tokens_out=count_tokens(text))
+        return text
+
 def summarize_chunk(chunk: str, query: str) -> str:
     """Summarize one chunk using LLM"""
     prompt = f"""
@@ -75,8 +87,7 @@ def summarize_chunk(chunk: str, query: str) -> str:
     TEXT:
     {chunk}
     """
-    resp = llm.invoke([HumanMessage(content=prompt)])
-    return resp.content
+    return complete("llm.summarize", prompt)
 
 def summarize_final(all_summaries: str, query: str) -> str:
     """Summarize combined chunk summaries into one final result"""
@@ -88,8 +99,15 @@ def summarize_final(all_summaries: str, query: str) -> str:
     CHUNK SUMMARIES:
     {all_summaries}
     """
-    resp = llm.invoke([HumanMessage(content=prompt)])
-    return resp.content
+    return complete("llm.merge", prompt)
+
+# =========================
+# Search
+# =========================
+def ddg_search(query: str, max_results: int) -> list:
+    """Run a DuckDuckGo text search"""
+    with DDGS() as ddgs:
+        return list(ddgs.text(query, max_results=max_results))
 
 # =========================
 # Main pipeline
@@ -98,26 +116,39 @@ def main():
     query = input("Enter the topic you want to search for: ")
     num_pages = int(input("Enter number of pages to extract: "))
 
-    all_text = ""
-    with DDGS() as ddgs:
-        results = ddgs.text(query, max_results=num_pages)
-        for res in results:
-            if "href" in res:
-                page_text = scrape_page(res["href"])
-                all_text += "\n" + page_text
-
-    # Chunk + summarize
-    chunks = chunk_text(all_text, max_len=1200)   # adjustable
-    print(f"🔹 Created {len(chunks)} chunks")
-
-    chunk_summaries = []
-    for i, chunk in enumerate(chunks, 1):
-        print(f"✍️ Summarizing chunk {i}/{len(chunks)}...")
-        chunk_summaries.append(summarize_chunk(chunk, query))
+    with TRACER.trace("scrape_main", pages_requested=num_pages):
+        with TRACER.span("search") as span:
+            results, from_cache = cached_search(query, num_pages, ddg_search)
+            span.set(cache_hit=from_cache, results=len(results))
+        if from_cache:
+            print("🔍 Using cached search results")
+        urls = [res["href"] for res in results if "href" in res]
+
+        # Scrape all pages concurrently, keeping search-result order
+        pages = fetch_all(
+            urls,
+            fetch=lambda i, url: scrape_page(url),
+            fallback=lambda url: "",
+        )
 
-    # Combine + final summarize
-    combined = "\n".join(chunk_summaries)
-    final_summary = summarize_final(combined, query)
+        with TRACER.span("chunk") as span:
+            # Drop boilerplate repeated across pages
+            dedup = DedupReport()
+            pages = drop_repeated_lines(pages, dedup)
+
+            # Chunk, drop near-duplicate chunks, then summarize
+            chunks = chunk_text(pages, max_tokens=1600)   # adjustable
+            chunks = drop_near_duplicates(chunks, dedup)
+            span.set(chunks=len(chunks), tokens=sum(count_tokens(c) for c in chunks))
+        print(f"🔹 Created {len(chunks)} chunks; {dedup}")
+
+        # Summarize chunks in parallel, then merge them tree-wise into one summary
+        print("✍️ Summarizing chunks (map-reduce)...")
+        final_summary = map_reduce_summarize(
+            chunks,
+            summarize_chunk=lambda chunk: summarize_chunk(chunk, query),
+            merge=lambda summaries: summarize_final(summaries, query),
+        )
 
     # Save
     os.makedirs("output", exist_ok=True)
@@ -125,6 +156,8 @@ def main():
         f.write(final_summary)
 
     print("\n✅ Extraction and summarization completed.")
+    print(f"LLM cache: {LLM_CACHE.stats()}")
+    print(format_report(COLLECTOR.report()))
     print("Check 'output/final_summary.txt'.")
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+# check_shared_copies.py
+"""
+Each project folder runs standalone, so modules shared between projects are
+kept as copies. This check fails if any copy has drifted from its canonical
+version (the first directory listed for it).
+
+Run:
+   python check_shared_copies.py          # exit 1 and list differing copies
+   python check_shared_copies.py --sync   # overwrite copies with the canonical file
+"""
+
+import argparse
+import difflib
+import os
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# module -> directories holding a copy, canonical first
+SHARED = {
+    **{
+        name: ("langgraph-chatbot", "agentic-webscraper")
+        for name in (
+            "chunking.py", "dedup.py", "extraction.py", "fetching.py", "page_cache.py",
+            "search_cache.py", "summarizing.py", "tokens.py", "tracing.py",
+        )
+    },
+    **{
+        name: ("seerah-assistant", "langchain-assistant")
+        for name in (
+            "embedding_backends.py", "embedding_cache.py", "hybrid_search.py",
+            "index_backends.py", "vector_index.py",
+        )
+    },
+    "llm_cache.py": ("langgraph-chatbot", "agentic-webscraper", "seerah-assistant", "first-resume-parser"),
+}
+
+
+def read(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def drifted():
+    """(canonical path, copy path) for every copy that differs from its canonical file."""
+    pairs = []
+    for name, dirs in sorted(SHARED.items()):
+        canonical = os.path.join(ROOT, dirs[0], name)
+        for other in dirs[1:]:
+            copy = os.path.join(ROOT, other, name)
+            if not os.path.exists(copy) or read(copy) != read(canonical):
+                pairs.append((canonical, copy))
+    return pairs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sync", action="store_true", help="copy each canonical file over its copies")
+    args = parser.parse_args()
+
+    pairs = drifted()
+    for canonical, copy in pairs:
+        a, b = os.path.relpath(canonical, ROOT), os.path.relpath(copy, ROOT)
+        if args.sync:
+            shutil.copyfile(canonical, copy)
+            print(f"synced {b} from {a}")
+            continue
+        print(f"{b} differs from {a}")
+        if os.path.exists(copy):
+            diff = difflib.unified_diff(read(canonical).splitlines(), read(copy).splitlines(), a, b, lineterm="")
+            print("\n".join(list(diff)[:40]))
+    if pairs and not args.sync:
+        print(f"\n{len(pairs)} shared module copies out of sync; run with --sync after editing the canonical file")
+        return 1
+    if not pairs:
+        print("all shared module copies are identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,9 +7,12 @@ from google import genai
 from dotenv import load_dotenv
 from bs4 import BeautifulSoup
 
+from llm_cache import LLM_CACHE
+
 # Load environment variables
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
+MODEL_NAME = "gemini-2.5-flash"
 
 # --- File Readers ---
 def read_pdf(file_path):
@@ -111,11 +114,12 @@ Instructions:
 Resume text:
 {data}
 """
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt
+    return LLM_CACHE.cached_call(
+        MODEL_NAME,
+        None,
+        prompt,
+        lambda: client.models.generate_content(model=MODEL_NAME, contents=prompt).text,
     )
-    return response.text
 
 
 # --- Step 2: Convert to Structured JSON ---
@@ -152,16 +156,19 @@ Data:
 
     client = genai.Client(api_key=api_key)
     prompt = build_prompt(data)
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt
+    response_text = LLM_CACHE.cached_call(
+        MODEL_NAME,
+        None,
+        prompt,
+        lambda: client.models.generate_content(model=MODEL_NAME, contents=prompt).text,
     )
-    json_str = extract_json(response.text)
+    json_str = extract_json(response_text)
 
     if json_str:
         try:
             return json.loads(json_str)
         except json.JSONDecodeError:
-            return None
-    else:
-        return None
\ No newline at end of file
+            pass
+    # Don't keep serving a response we couldn't parse
+    LLM_CACHE.discard(MODEL_NAME, None, prompt)
+    return None
\ No newline at end of file
@@ -1,53 +1,81 @@
 import os
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
 from langchain.chains import RetrievalQA
 from langchain_community.document_loaders import PyPDFLoader
 
+from embedding_backends import make_embeddings
+from hybrid_search import HybridRetriever, reranker_from_env
+from index_backends import config_from_env
+from vector_index import IncrementalIndex
+
 # ------------------------
 # 1. Load API Key
 # ------------------------
 load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in .env file")
+api_key = os.getenv("OPENAI_API_KEY")  # indexing with a local embedding backend works without it
 
 # ------------------------
-# 2. Load Documents (PDFs)
+# 2. Splitter & embeddings
 # ------------------------
-pdf_path = "CV.pdf"   # replace with your own
-loader = PyPDFLoader(pdf_path)
-documents = loader.load()
+pdf_paths = ["CV.pdf"]   # replace with your own; extra PDFs are added to the saved index
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".index", "assistant")
 
-# ------------------------
-# 3. Split Documents into Chunks
-# ------------------------
 text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000,
-    chunk_overlap=200
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP
 )
-docs = text_splitter.split_documents(documents)
+# EMBEDDING_BACKEND=openai (default, cached per chunk text) | hashing | sentence-transformers
+embeddings = make_embeddings(api_key=api_key)
 
 # ------------------------
-# 4. Create Vector DB (FAISS)
+# 3. Load Documents (PDFs), one text per page
 # ------------------------
-embeddings = OpenAIEmbeddings(openai_api_key=api_key)
-vectorstore = FAISS.from_documents(docs, embeddings)
+def load_pages(path):
+    return [doc.page_content for doc in PyPDFLoader(path).load()]
+
+# ------------------------
+# 4. Vector DB (FAISS), updated incrementally: only new or edited chunks are embedded.
+#    RAG_INDEX=flat|sq16|ivf|hnsw|pq picks the index backend (see index_backends.py)
+# ------------------------
+index = IncrementalIndex(
+    INDEX_DIR,
+    embeddings,
+    settings={
+        "splitter": {"type": "recursive_character", "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP},
+        "embedding_model": embeddings.model,
+    },
+    index_config=config_from_env(),
+)
+reports = [index.sync(path, load_pages, text_splitter.split_text) for path in pdf_paths]
+for report in reports:
+    print(f"Index: {report}")
+if index.changed:
+    index.save()
+    print(f"Embeddings: {embeddings.stats()}")
+vectorstore = index.vectorstore
 
 # ------------------------
 # 5. Build Retrieval-QA Chain
 # ------------------------
+if not api_key:
+    raise ValueError("OPENAI_API_KEY not found in .env file")
+
 llm = ChatOpenAI(
     openai_api_key=api_key,
     model="gpt-4o-mini",   # or "gpt-3.5-turbo"
     temperature=0
 )
 
+# Hybrid BM25 + vector retrieval; RAG_RERANK=1 adds a local cross-encoder re-rank
+retriever = HybridRetriever(vectorstore=vectorstore, bm25=index.bm25, k=4, reranker=reranker_from_env())
+
 qa_chain = RetrievalQA.from_chain_type(
     llm=llm,
-    retriever=vectorstore.as_retriever(),
+    retriever=retriever,
     chain_type="stuff"   # simplest method
 )
 
@@ -0,0 +1,164 @@
+# embedding_backends.py
+"""
+Pluggable embedding backends for the RAG pipelines, selected with
+EMBEDDING_BACKEND:
+
+    openai                  OpenAIEmbeddings behind CachedEmbeddings (default)
+    hashing                 HashingEmbeddings: offline, NumPy only, no model
+    sentence-transformers   a small local transformer (LOCAL_EMBEDDING_MODEL,
+                            default all-MiniLM-L6-v2) behind CachedEmbeddings;
+                            needs `pip install sentence-transformers`
+
+Local backends split the texts into batches and embed them on a thread
+pool. The transformer releases the GIL inside torch, so batches overlap.
+The hashing backend's tokenizing is Python, so it gains less from threads,
+but it already runs at thousands of chunks/s. See bench_embeddings.py.
+
+Every backend has a distinct `model` name, which the index manifest
+records, so switching backends starts a fresh index rather than mixing
+vector spaces.
+"""
+
+import os
+import time
+import zlib
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import CachedEmbeddings
+from hybrid_search import tokenize
+
+BACKENDS = ("openai", "hashing", "sentence-transformers")
+HASHING_DIM = 512
+LOCAL_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+BATCH_SIZE = 64
+WORKERS = os.cpu_count() or 1
+
+
+# =========================
+# Local backends
+# =========================
+class LocalEmbeddings(Embeddings):
+    """Batched, multi-threaded embedding; subclasses implement `_embed_batch`."""
+
+    model: str
+
+    def __init__(self, batch_size: int = BATCH_SIZE, workers: int = WORKERS):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.chunks = 0
+        self.seconds = 0.0
+
+    @abstractmethod
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), dim) float32 matrix of unit vectors for one batch."""
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), dim) float32 matrix of unit vectors."""
+        start = time.perf_counter()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) <= 1 or self.workers <= 1:
+            parts = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as pool:
+                parts = list(pool.map(self._embed_batch, batches))
+        self.chunks += len(texts)
+        self.seconds += time.perf_counter() - start
+        return np.concatenate(parts) if parts else np.empty((0, 0), np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chunks": self.chunks,
+            "chunks_per_s": round(self.chunks / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+
+class HashingEmbeddings(LocalEmbeddings):
+    """
+    Signed feature hashing of unigrams and bigrams into `dim` buckets, with
+    sublinear (log) term weighting and L2 normalisation. Each bucket sums
+    randomly signed features, so this is a random projection of the sparse
+    term-count vector. Vectors depend on the text alone, with no fitted
+    vocabulary or idf, so they stay valid when the index is updated
+    incrementally.
+    """
+
+    def __init__(self, dim: int = HASHING_DIM, batch_size: int = 256, workers: int = WORKERS):
+        super().__init__(batch_size, workers)
+        self.dim = dim
+        self.model = f"hashing-{dim}-v1"
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        rows, hashes = [], []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            # crc32 is stable across processes, unlike hash(), and cheaper than memoizing it
+            hashes.extend(zlib.crc32(feature.encode("utf-8")) for feature in features)
+            rows.extend([row] * len(features))
+
+        hashes = np.asarray(hashes, dtype=np.uint32)
+        signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+        flat = np.asarray(rows, dtype=np.int64) * self.dim + (hashes % self.dim).astype(np.int64)
+        counts = np.bincount(flat, weights=signs, minlength=len(texts) * self.dim)
+        vectors = counts.reshape(len(texts), self.dim).astype(np.float32)
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbeddings(LocalEmbeddings):
+    """A local sentence-transformers model on CPU."""
+
+    def __init__(self, model: str = LOCAL_MODEL, batch_size: int = BATCH_SIZE, workers: int = 2):
+        from sentence_transformers import SentenceTransformer
+
+        super().__init__(batch_size, workers)
+        self.model = model
+        self._model = SentenceTransformer(model, device="cpu")
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        return self._model.encode(
+            texts, batch_size=len(texts), normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+
+# =========================
+# Selection
+# =========================
+def make_embeddings(
+    backend: Optional[str] = None,
+    api_key: Optional[str] = None,
+    openai_model: Optional[str] = None,
+) -> Embeddings:
+    """
+    The configured backend (argument, else EMBEDDING_BACKEND, else openai).
+    `openai_model=None` keeps the OpenAIEmbeddings default model.
+    """
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "openai")).lower()
+    if backend == "hashing":
+        return HashingEmbeddings()  # computing is cheaper than a cache lookup
+    if backend == "sentence-transformers":
+        local = SentenceTransformerEmbeddings(os.getenv("LOCAL_EMBEDDING_MODEL", LOCAL_MODEL))
+        # The model batches and threads itself; the cache only skips texts seen before
+        return CachedEmbeddings(local, model=local.model, max_concurrency=1, max_retries=0)
+    if backend == "openai":
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in .env file (or set EMBEDDING_BACKEND=hashing)")
+        from langchain_openai import OpenAIEmbeddings
+
+        # Batched, concurrent and cached per chunk text; retries are handled by the wrapper
+        kwargs = {"model": openai_model} if openai_model else {}
+        base = OpenAIEmbeddings(api_key=api_key, max_retries=0, **kwargs)
+        return CachedEmbeddings(base, model=base.model)
+    raise ValueError(f"unknown EMBEDDING_BACKEND {backend!r}; expected one of {BACKENDS}")
@@ -0,0 +1,190 @@
+# answer_cache.py
+"""
+Semantic cache of deep_scrape_search answers.
+
+Paraphrases of a question ("who won the F1 race yesterday" / "yesterday's
+F1 race winner") should not each trigger a full search, scrape and
+summarization. Every answered query is stored with the embedding of the
+query as asked; a new query whose embedding has cosine similarity of at
+least `threshold` with a fresh entry gets that entry's answer.
+
+Exact repeats are keyed on case and whitespace only, so every word and its
+order count: "flights from Paris to London" and "flights from London to
+Paris" are different questions. Embeddings barely separate such
+reorderings, so a semantic match that only reorders the query's words is
+treated as a miss.
+
+Embeddings of live entries are kept in one NumPy matrix (unit rows), so a
+lookup is a single matrix-vector product. Entries expire after `ttl` and the
+least recently used are evicted beyond `max_entries`. Backed by SQLite so
+answers survive restarts.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+DEFAULT_PATH = os.path.join(CACHE_DIR, "answers.sqlite")
+DEFAULT_TTL = 60 * 60          # current-events answers go stale
+DEFAULT_MAX_ENTRIES = 1000
+SIMILARITY_THRESHOLD = 0.9     # cosine similarity that counts as "same question"
+SCHEMA_VERSION = 2             # v1 keyed on stopword-free, sorted words
+
+Embed = Callable[[str], List[float]]
+
+
+def answer_key(query: str) -> str:
+    """Case- and whitespace-insensitive key; keeps every word, in order."""
+    return " ".join(query.lower().split())
+
+
+def _reordered(a: str, b: str) -> bool:
+    """True if `a` and `b` use the same words in a different order."""
+    words_a, words_b = re.findall(r"\w+", a.lower()), re.findall(r"\w+", b.lower())
+    return words_a != words_b and sorted(words_a) == sorted(words_b)
+
+
+def _unit(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+class AnswerCache:
+    """SQLite-backed semantic answer cache with an in-memory similarity matrix."""
+
+    def __init__(
+        self,
+        embed: Optional[Embed] = None,
+        path: str = DEFAULT_PATH,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        threshold: float = SIMILARITY_THRESHOLD,
+    ):
+        self.embed = embed
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                key        TEXT PRIMARY KEY,
+                query      TEXT NOT NULL,
+                num_pages  INTEGER NOT NULL,
+                embedding  BLOB NOT NULL,
+                answer     TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used  REAL NOT NULL
+            )
+            """
+        )
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.commit()
+        self._load()
+
+    def _load(self) -> None:
+        """(Re)build the in-memory matrix from the fresh rows."""
+        self._conn.execute("DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl,))
+        self._conn.commit()
+        rows = self._conn.execute("SELECT key, num_pages, embedding, created_at FROM answers").fetchall()
+        self._keys = [r[0] for r in rows]
+        self._pages = np.array([r[1] for r in rows], dtype=np.int32)
+        self._created = np.array([r[3] for r in rows], dtype=np.float64)
+        self._matrix = (
+            np.vstack([np.frombuffer(r[2], dtype=np.float32) for r in rows])
+            if rows else np.empty((0, 0), dtype=np.float32)
+        )
+
+    def _best_match(self, vector: np.ndarray, num_pages: int) -> Tuple[Optional[str], float]:
+        if not len(self._keys) or self._matrix.shape[1] != vector.shape[0]:
+            return None, 0.0
+        scores = self._matrix @ vector
+        # Only fresh entries that were answered from at least as many pages
+        usable = (self._pages >= num_pages) & (self._created >= time.time() - self.ttl)
+        scores = np.where(usable, scores, -1.0)
+        i = int(scores.argmax())
+        return (self._keys[i], float(scores[i])) if scores[i] >= self.threshold else (None, float(scores[i]))
+
+    def get(self, query: str, num_pages: int) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Return `(answer, embedding)`. `answer` is None on a miss; `embedding`
+        is the query's embedding (if one was computed) so put() can reuse it.
+        """
+        key = answer_key(query)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer, num_pages, created_at FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+        # Exact repeat: no embedding call needed
+        if row and row[1] >= num_pages and time.time() - row[2] < self.ttl:
+            return self._hit(key, row[0]), None
+        if self.embed is None:
+            self.misses += 1
+            return None, None
+
+        vector = _unit(self.embed(query))
+        with self._lock:
+            match, _ = self._best_match(vector, num_pages)
+            answer = None
+            if match is not None:
+                row = self._conn.execute("SELECT query, answer FROM answers WHERE key = ?", (match,)).fetchone()
+                # Same words, different order: likely a different question (direction, roles)
+                answer = row[1] if row and not _reordered(query, row[0]) else None
+        if answer is None:
+            self.misses += 1
+            return None, vector
+        return self._hit(match, answer), vector
+
+    def _hit(self, key: str, answer: str) -> str:
+        self.hits += 1
+        with self._lock:
+            self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return answer
+
+    def put(self, query: str, num_pages: int, answer: str, vector: Optional[np.ndarray] = None) -> None:
+        key = answer_key(query)
+        if vector is None:
+            if self.embed is None:
+                return
+            vector = _unit(self.embed(query))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, query, num_pages, vector.astype(np.float32).tobytes(), answer, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+            self._load()
+
+    def _evict(self) -> None:
+        """Drop expired answers and the least recently used beyond max_entries."""
+        self._conn.execute("DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM answers WHERE key IN ("
+            "SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._keys),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
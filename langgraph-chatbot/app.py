@@ -1,6 +1,9 @@
 import streamlit as st
 import time
+import uuid
+from contextlib import closing
 from langchain_core.messages import HumanMessage
+from async_runner import BackgroundLoop
 from chatbot import app  # your compiled graph
 import re
 
@@ -54,20 +57,62 @@ st.markdown("Your AI assistant that combines smart reasoning with deep web resea
 # --- Session State ---
 if "messages" not in st.session_state:
     st.session_state["messages"] = []
+if "thread_id" not in st.session_state:
+    # One LangGraph conversation thread per browser session
+    st.session_state["thread_id"] = f"st-{uuid.uuid4()}"
+
+# --- Shared event loop: graph runs from all sessions execute concurrently on it ---
+@st.cache_resource
+def get_event_loop() -> BackgroundLoop:
+    return BackgroundLoop()
 
 # --- Helper: render assistant safely ---
-def render_assistant(content: str):
-    # Case 1: fenced code block
-    code_block = re.search(r"```(\w+)?\n([\s\S]+?)```", content)
-    if code_block:
-        lang = code_block.group(1) or "text"
-        code_text = code_block.group(2)
-        st.code(code_text, language=lang)
-    # Case 2: plain C++-like content without fences
-    elif content.strip().startswith("#include") or "int main" in content:
-        st.code(content, language="cpp")
-    else:
-        st.markdown(f"<div class='bot-msg'>🤖 {content}</div>", unsafe_allow_html=True)
+# Fenced code blocks; an unterminated fence (still streaming) runs to the end
+CODE_FENCE = re.compile(r"```(\w+)?\n([\s\S]*?)(?:```|$)")
+RENDER_INTERVAL = 0.05  # seconds between placeholder redraws while streaming
+
+
+def render_assistant(content: str, target=None):
+    """Render an answer (text and code blocks) into `target` (an st.empty) or the page."""
+    box = target.container() if target is not None else st.container()
+    with box:
+        # Plain C++-like content without fences
+        if "```" not in content and (content.strip().startswith("#include") or "int main" in content):
+            st.code(content, language="cpp")
+            return
+        pos = 0
+        for block in CODE_FENCE.finditer(content):
+            text = content[pos:block.start()].strip()
+            if text:
+                st.markdown(f"<div class='bot-msg'>🤖 {text}</div>", unsafe_allow_html=True)
+            st.code(block.group(2), language=block.group(1) or "text")
+            pos = block.end()
+        text = content[pos:].strip()
+        if text:
+            st.markdown(f"<div class='bot-msg'>🤖 {text}</div>", unsafe_allow_html=True)
+
+# --- Helper: live research progress from the deep_scrape_search tool ---
+FINDING_CHARS = 280
+
+
+def describe_progress(event: dict) -> str:
+    """One status line for a progress event emitted by the tool."""
+    stage = event.get("stage")
+    if stage == "cached":
+        return "⚡ Reusing a recent answer to a similar question"
+    if stage == "search":
+        return f"🔍 Found {event['results']} pages to read"
+    if stage == "page":
+        return f"📄 Read page {event['page']} ({event['pages_done']}/{event['pages_total']}): {event['chunks']} sections"
+    if stage == "summary":
+        text = " ".join(event["text"].split())
+        if len(text) > FINDING_CHARS:
+            text = text[:FINDING_CHARS].rsplit(" ", 1)[0] + "…"
+        return f"📝 Page {event['page']}, part {event['chunk']}: {text}"
+    if stage == "merge":
+        return f"🧩 Merging {event['summaries']} findings into one answer"
+    return ""
+
 
 # --- Chat History ---
 for role, content in st.session_state["messages"]:
@@ -85,35 +130,65 @@ if prompt := st.chat_input("Type your question here..."):
 
     with st.spinner("🤖 Thinking..."):
         final_response = ""
+        message_id = None
         searching_shown = False
+        progress_area = st.container()  # research progress sits above the answer
+        status = None
         placeholder = st.empty()
+        start = time.perf_counter()
+        first_token_at = None
+        last_render = 0.0
 
-        for event in app.stream(
+        # "messages" streams LLM tokens as they are generated, "updates" marks tool
+        # calls and "custom" carries the tool's progress events. Closing the
+        # iterator (e.g. when the session reruns) cancels the run and the tool.
+        events = get_event_loop().iterate(app.astream(
             {"messages": [HumanMessage(content=prompt)]},
-            config={"configurable": {"thread_id": "st-user"}}
-        ):
-            if "chatbot" in event:
-                msg = event["chatbot"]["messages"][-1]
-
-                if getattr(msg, "tool_calls", None) and not searching_shown:
-                    st.toast("🔍 Searching the web...")
-                    searching_shown = True
-
-                elif getattr(msg, "content", None):
-                    final_response = msg.content
-
-                    # typing animation only for text (not code)
-                    if not ("```" in final_response or "#include" in final_response):
-                        typed_text = ""
-                        for word in final_response.split():
-                            typed_text += word + " "
-                            placeholder.markdown(
-                                f"<div class='bot-msg'>🤖 {typed_text.strip()}</div>",
-                                unsafe_allow_html=True,
-                            )
-                            time.sleep(0.04)
-                    else:
-                        placeholder.empty()
-                        render_assistant(final_response)
-
-        st.session_state["messages"].append(("assistant", final_response))
\ No newline at end of file
+            config={"configurable": {"thread_id": st.session_state["thread_id"]}},
+            stream_mode=["messages", "updates", "custom"],
+        ))
+        with closing(events):
+            for mode, payload in events:
+                if mode == "custom":
+                    if status is None:
+                        status = progress_area.status("🔍 Researching...", expanded=True)
+                    line = describe_progress(payload)
+                    if line:
+                        status.write(line)
+                    if payload.get("stage") == "page":
+                        status.update(label=f"🔍 Researching... {payload['pages_done']}/{payload['pages_total']} pages read")
+                    continue
+
+                if mode == "updates":
+                    msg = (payload.get("chatbot") or {}).get("messages", [None])[-1]
+                    if getattr(msg, "tool_calls", None) and not searching_shown:
+                        st.toast("🔍 Searching the web...")
+                        searching_shown = True
+                    continue
+
+                chunk, metadata = payload
+                # Only the answering model; tokens from summarizer calls inside the tool are skipped
+                if metadata.get("langgraph_node") != "chatbot" or not isinstance(chunk.content, str):
+                    continue
+                if chunk.id != message_id:  # a new model call: show only the latest answer
+                    message_id = chunk.id
+                    final_response = ""
+                if not chunk.content:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter() - start
+                    if status is not None:
+                        status.update(label="✅ Research complete", state="complete", expanded=False)
+                final_response += chunk.content
+                if time.perf_counter() - last_render >= RENDER_INTERVAL:
+                    render_assistant(final_response, placeholder)
+                    last_render = time.perf_counter()
+
+        render_assistant(final_response, placeholder)
+        total = time.perf_counter() - start
+
+        st.session_state["messages"].append(("assistant", final_response))
+        if first_token_at is not None:
+            timing = f"⏱ first token {first_token_at:.2f} s · total {total:.2f} s"
+            st.markdown(f"<div class='system-msg'>{timing}</div>", unsafe_allow_html=True)
+            st.session_state["messages"].append(("system", timing))
@@ -0,0 +1,58 @@
+# async_runner.py
+"""
+One long-lived asyncio event loop on a background thread.
+
+Streamlit runs every browser session's script in its own thread. Rather
+than spinning up (and tearing down) an event loop per message, all
+sessions submit their graph runs to this shared loop, where they run
+concurrently. The async OpenAI client and its connection pool also stay
+bound to a single loop this way.
+"""
+
+import asyncio
+import queue
+import threading
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+_END = object()
+
+
+class BackgroundLoop:
+    def __init__(self, name: str = "graph-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the loop and block until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def iterate(self, items: AsyncIterator[T]) -> Iterator[T]:
+        """
+        Consume an async iterator on the loop and yield its items in the
+        calling thread as they arrive. If the caller stops iterating (or its
+        thread is interrupted), the async side is cancelled.
+        """
+        out: "queue.Queue" = queue.Queue()
+
+        async def pump() -> None:
+            try:
+                async for item in items:
+                    out.put((item, None))
+            except BaseException as e:  # includes CancelledError
+                out.put((_END, e))
+                raise
+            out.put((_END, None))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                item, error = out.get()
+                if item is _END:
+                    if error is not None and not isinstance(error, asyncio.CancelledError):
+                        raise error
+                    return
+                yield item
+        finally:
+            future.cancel()
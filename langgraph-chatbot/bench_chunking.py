@@ -0,0 +1,77 @@
+# bench_chunking.py
+"""
+Benchmark the token-budget chunker against the old word-count chunk_text.
+
+The input is the extracted text of the saved pages in fixtures/, repeated
+to simulate a 10-page scrape. Reports wall time, peak memory and how evenly
+each chunker fills its chunks (in model tokens).
+
+Run:
+   python bench_chunking.py [copies]
+"""
+
+import glob
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import chunking
+from extraction import extract_blocks
+from tokens import count_tokens
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def legacy_chunk_text(text: str, max_len: int = 1200):
+    """The original chunk_text: fixed word count per chunk."""
+    words = text.split()
+    chunks, curr = [], []
+    for w in words:
+        curr.append(w)
+        if len(curr) >= max_len:
+            chunks.append(" ".join(curr))
+            curr = []
+    if curr:
+        chunks.append(" ".join(curr))
+    return chunks
+
+
+def load_pages(copies: int):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            blocks = extract_blocks(f.read())
+        pages.append("\n".join("\n".join(lines) for lines in blocks.values()))
+    pages = (pages * copies)[:copies]
+    return [f"=== PAGE {i}/{len(pages)} ===\n{page}" for i, page in enumerate(pages, start=1)]
+
+
+def measure(name: str, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sizes = [count_tokens(c) for c in chunks]
+    print(
+        f"   {name:<28} {elapsed * 1000:8.1f} ms  peak {peak / 1024:7.0f} KB  "
+        f"{len(chunks):3d} chunks  tokens min/mean/max "
+        f"{min(sizes)}/{statistics.mean(sizes):.0f}/{max(sizes)}"
+    )
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    pages = load_pages(copies)
+    print(f"\n{len(pages)} pages, {sum(len(p) for p in pages) / 1024:.0f} KB of text")
+
+    measure("legacy (1200 words)", lambda: legacy_chunk_text("\n" + "\n".join(pages), 1200))
+    measure("token budget (1600 tokens)", lambda: chunking.chunk_text(iter(pages), 1600))
+
+
+if __name__ == "__main__":
+    main()
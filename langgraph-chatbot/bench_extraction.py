@@ -0,0 +1,67 @@
+# bench_extraction.py
+"""
+Benchmark the single-pass extraction engine against the old four-pass
+BeautifulSoup extraction on the saved HTML pages in fixtures/.
+
+Run:
+   python bench_extraction.py [repeats]
+"""
+
+import glob
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+import extraction
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def legacy_extract(html: str):
+    """The original _scrape_page extraction: one find_all pass per block."""
+    soup = BeautifulSoup(html, "html.parser")
+    return {
+        "headlines": [h.get_text(strip=True) for h in soup.find_all(["h1", "h2", "h3"])],
+        "article": [p.get_text(strip=True) for p in soup.find_all("p")],
+        "captions": [c.get_text(strip=True) for c in soup.find_all("figcaption")],
+        "list_items": [li.get_text(strip=True) for li in soup.find_all("li")],
+    }
+
+
+def timed(fn, html: str, repeats: int) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    candidates = [
+        ("legacy (4 passes, html.parser)", legacy_extract),
+        ("single pass, html.parser", lambda html: extraction._extract_bs4(html, "")),
+    ]
+    if extraction.BACKEND == "lxml":
+        candidates.append(("single pass, lxml", lambda html: extraction._extract_lxml(html, "")))
+
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        print(f"\n{os.path.basename(path)} ({len(html) / 1024:.0f} KB)")
+
+        baseline = None
+        reference = legacy_extract(html)
+        for name, fn in candidates:
+            ms = timed(fn, html, repeats)
+            baseline = baseline or ms
+            same = {k: len(v) for k, v in fn(html).items()} == {k: len(v) for k, v in reference.items()}
+            print(f"   {name:<32} {ms:8.2f} ms   x{baseline / ms:5.1f}   same blocks: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,32 @@
 # deep_scrape_chatbot_memoryless.py
+import asyncio
 import os
-import requests
-from typing import List
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional
 
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 from ddgs import DDGS
 
-from langgraph.graph import StateGraph, MessagesState, END
+from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_openai import ChatOpenAI
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.tools import tool
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.config import get_stream_writer
+from langgraph.constants import TAG_NOSTREAM
+
+from answer_cache import AnswerCache
+from checkpointer import BoundedSqliteSaver
+from context_window import ChatState, plan_window, transcript
+from fetching import fetch_text
+from llm_cache import LLM_CACHE
+from pipeline import PipelineCancelled, run_pipeline
+from ranking import SUMMARY_TOKEN_BUDGET
+from search_cache import cached_search
+from tokens import count_tokens
+from tracing import COLLECTOR, TRACER, format_report
 
 
 # =========================
@@ -23,73 +37,87 @@ api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise ValueError("OPENAI_API_KEY not found in .env file")
 
+MODEL_NAME = "gpt-4o-mini"
+TEMPERATURE = 0.2
+
 llm = ChatOpenAI(
-    model="gpt-4o-mini",
+    model=MODEL_NAME,
     api_key=api_key,
-    temperature=0.2,
+    temperature=TEMPERATURE,
 ).bind_tools([])  # will rebind later
 
+# Tool-free model for the rolling conversation summary; tagged so its tokens
+# are not streamed to the UI as if they were the answer
+summarizer = ChatOpenAI(model=MODEL_NAME, api_key=api_key, temperature=TEMPERATURE).with_config(
+    tags=[TAG_NOSTREAM]
+)
+
+
+# Structural lines of a scraped page block; never dropped as boilerplate
+SECTION_LINE = re.compile(r"^(=== PAGE \d+/\d+ ===|URL: .*|[A-Z ]+:|\.\.\.\[truncated\])$")
+
 
 def _clip(text: str, max_chars: int = 6000) -> str:
     """Prevent overly-long tool returns."""
     return text if len(text) <= max_chars else text[:max_chars] + "\n...[truncated]"
 
 
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/115.0 Safari/537.36"
+    )
+}
+
+
+def _format_sections(blocks: Dict[str, List[str]]) -> str:
+    """Lay out extracted headlines, paragraphs, captions and list items."""
+    headlines = "\n".join(blocks["headlines"])
+    paragraphs = "\n".join(blocks["article"])
+    captions = "\n".join(blocks["captions"])
+    list_items = "\n".join(blocks["list_items"])
+
+    return (
+        f"HEADLINES:\n{_clip(headlines)}\n\n"
+        f"ARTICLE:\n{_clip(paragraphs)}\n\n"
+        f"CAPTIONS:\n{_clip(captions)}\n\n"
+        f"LIST ITEMS:\n{_clip(list_items)}\n"
+    )
+
+
 def _scrape_page(url: str, page_index: int, total_pages: int) -> str:
     """Scrape one page and return structured text (headlines, paragraphs, captions, lists)."""
     try:
-        resp = requests.get(
-            url,
-            timeout=12,
-            headers={
-                "User-Agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/115.0 Safari/537.36"
-                )
-            },
-        )
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        headlines = "\n".join(h.get_text(strip=True) for h in soup.find_all(["h1", "h2", "h3"]))
-        paragraphs = "\n".join(p.get_text(strip=True) for p in soup.find_all("p"))
-        captions = "\n".join(c.get_text(strip=True) for c in soup.find_all("figcaption"))
-        list_items = "\n".join(li.get_text(strip=True) for li in soup.find_all("li"))
-
-        block = (
+        sections = fetch_text(url, _format_sections, timeout=12, headers=HEADERS)
+        return (
             f"=== PAGE {page_index}/{total_pages} ===\n"
             f"URL: {url}\n\n"
-            f"HEADLINES:\n{_clip(headlines)}\n\n"
-            f"ARTICLE:\n{_clip(paragraphs)}\n\n"
-            f"CAPTIONS:\n{_clip(captions)}\n\n"
-            f"LIST ITEMS:\n{_clip(list_items)}\n"
+            f"{sections}"
         )
-        return block
     except Exception as e:
         return f"❌ Error scraping {url}: {e}"
 
 
 # =========================
-# Chunking
+# Summarization helpers
 # =========================
-def chunk_text(text: str, max_len: int = 1200) -> List[str]:
-    """Split text into smaller chunks (approx by words)."""
-    words = text.split()
-    chunks, curr = [], []
-    for w in words:
-        curr.append(w)
-        if len(curr) >= max_len:
-            chunks.append(" ".join(curr))
-            curr = []
-    if curr:
-        chunks.append(" ".join(curr))
-    return chunks
+def _complete(span_name: str, prompt: str) -> str:
+    """One cached LLM call, traced with token counts and cache outcome."""
+    messages = [HumanMessage(content=prompt)]
+    called = False
+
+    def call() -> str:
+        nonlocal called
+        called = True
+        return llm.invoke(messages).content
+
+    with TRACER.span(span_name, model=MODEL_NAME) as span:
+        text = LLM_CACHE.cached_call(MODEL_NAME, TEMPERATURE, messages, call)
+        span.set(cache_hit=not called, tokens_in=count_tokens(prompt), tokens_out=count_tokens(text))
+        return text
 
 
-# =========================
-# Summarization helpers
-# =========================
 def summarize_chunk(chunk: str, query: str) -> str:
     """Summarize one chunk using LLM."""
     prompt = f"""
@@ -100,8 +128,7 @@ def summarize_chunk(chunk: str, query: str) -> str:
     TEXT:
     {chunk}
     """
-    resp = llm.invoke([HumanMessage(content=prompt)])
-    return resp.content
+    return _complete("llm.summarize", prompt)
 
 
 def summarize_final(all_summaries: str, query: str) -> str:
@@ -114,66 +141,143 @@ def summarize_final(all_summaries: str, query: str) -> str:
     CHUNK SUMMARIES:
     {all_summaries}
     """
-    resp = llm.invoke([HumanMessage(content=prompt)])
-    return resp.content
+    return _complete("llm.merge", prompt)
 
 
 # =========================
 # Deep scrape + summarize tool
 # =========================
-@tool
-def deep_scrape_search(query: str, num_pages: int = 3) -> str:
+def _ddg_search(query: str, max_results: int) -> list:
+    with DDGS() as ddgs:
+        return list(ddgs.text(query, max_results=max_results))
+
+
+# Paraphrased questions reuse an earlier answer instead of a fresh scrape
+EMBEDDING_MODEL = "text-embedding-3-small"
+embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL, api_key=api_key)
+ANSWER_CACHE = AnswerCache(embed=embeddings.embed_query)
+
+
+Progress = Callable[[Dict[str, Any]], None]
+
+
+def _deep_scrape(
+    query: str,
+    num_pages: int,
+    progress: Progress = lambda event: None,
+    cancel: Optional[threading.Event] = None,
+) -> str:
     """
-    Deep search + summarization tool:
-    - Finds results from DuckDuckGo
-    - Scrapes textual content
-    - Splits into chunks
-    - Summarizes chunks and merges into a final summary
+    Blocking search → scrape → summarize pipeline behind deep_scrape_search,
+    semantically cached. Structured progress events go to `progress`;
+    setting `cancel` stops the work early.
     """
     num_pages = max(1, min(int(num_pages), 10))
-    all_text = ""
 
+    with TRACER.trace("deep_scrape", pages_requested=num_pages) as trace:
+        try:
+            with TRACER.span("answer_cache") as span:
+                answer, vector = ANSWER_CACHE.get(query, num_pages)
+                span.set(cache_hit=answer is not None)
+        except Exception as e:  # embedding API trouble shouldn't block a real search
+            print(f"\n⚠️ Answer cache unavailable: {e}")
+            answer, vector = None, None
+        if answer is not None:
+            print(f"\n⚡ Answered from the semantic cache ({ANSWER_CACHE.stats()}).")
+            trace.set(cache_hit=True)
+            progress({"stage": "cached"})
+            return answer
+
+        result = _scrape_and_summarize(query, num_pages, progress, cancel)
+        trace.set(cache_hit=False, ok=result.endswith("[TOOL COMPLETE]"))
+        if result.endswith("[TOOL COMPLETE]"):  # only successful summaries are cached
+            try:
+                ANSWER_CACHE.put(query, num_pages, result, vector)
+            except Exception as e:
+                print(f"\n⚠️ Could not cache answer: {e}")
+        return result
+
+
+def _scrape_and_summarize(
+    query: str,
+    num_pages: int,
+    progress: Progress,
+    cancel: Optional[threading.Event],
+) -> str:
     try:
-        print("\n🔍 Stage 1: Searching DuckDuckGo...")
-        with DDGS() as ddgs:
-            results = ddgs.text(query, max_results=num_pages)
-            urls = [res.get("href") for res in results if res.get("href")]
+        with TRACER.span("search") as span:
+            results, from_cache = cached_search(query, num_pages, _ddg_search)
+            span.set(cache_hit=from_cache, results=len(results))
+        if from_cache:
+            print("\n🔍 Stage 1: Skipped — using cached DuckDuckGo results.")
+        else:
+            print("\n🔍 Stage 1: Searched DuckDuckGo.")
+        urls = [res.get("href") for res in results if res.get("href")]
 
         if not urls:
             return "No search results found."
 
         print(f"   → Found {len(urls)} pages.")
+        progress({"stage": "search", "results": len(urls), "from_cache": from_cache})
+
+        print(f"\n📄 Stage 2-5: Streaming {len(urls)} pages through scrape → chunk → summarize → merge...")
+        final_summary, stats = run_pipeline(
+            urls,
+            scrape=lambda i, url: _scrape_page(url, i, len(urls)),
+            fallback=lambda url: f"❌ Timed out scraping {url}",
+            summarize_chunk=lambda chunk: summarize_chunk(chunk, query),
+            merge=lambda summaries: summarize_final(summaries, query),
+            protected=SECTION_LINE,
+            query=query,
+            summary_budget=SUMMARY_TOKEN_BUDGET,
+            progress=progress,
+            cancel=cancel,
+        )
+        print(
+            f"   → {stats.pages} pages, {stats.chunks} chunks "
+            f"({stats.chunks_skipped} skipped as off-topic); {stats.dedup}."
+        )
 
-        print("\n📄 Stage 2: Scraping pages...")
-        for i, url in enumerate(urls, start=1):
-            print(f"   → Scraping {url}")
-            all_text += "\n" + _scrape_page(url, i, len(urls))
-
-        if not all_text.strip():
+        if not final_summary:
             return "No useful content found."
 
-        print("\n✂️ Stage 3: Chunking text...")
-        chunks = chunk_text(all_text, max_len=1200)
-        print(f"   → Created {len(chunks)} chunks.")
-
-        print("\n📝 Stage 4: Summarizing chunks...")
-        chunk_summaries = []
-        for i, chunk in enumerate(chunks, start=1):
-            print(f"   → Summarizing chunk {i}/{len(chunks)}")
-            summary = summarize_chunk(chunk, query)
-            chunk_summaries.append(summary)
-
-        print("\n📚 Stage 5: Combining summaries into final result...")
-        combined = "\n".join(chunk_summaries)
-        final_summary = summarize_final(combined, query)
-
         print("\n✅ Stage 6: Done! Returning final summary.")
+        print(f"   → LLM cache: {LLM_CACHE.stats()}")
+        print("\n" + format_report(COLLECTOR.report()))
         return final_summary + "\n\n(Source: DuckDuckGo scrape) [TOOL COMPLETE]"
 
+    except PipelineCancelled:
+        print("\n⛔ Search cancelled.")
+        return "Search cancelled."
     except Exception as e:
         return f"❌ Search error: {e}"
 
 
+@tool
+async def deep_scrape_search(query: str, num_pages: int = 3) -> str:
+    """
+    Deep search + summarization tool:
+    - Finds results from DuckDuckGo
+    - Scrapes textual content
+    - Splits into chunks
+    - Summarizes chunks and merges into a final summary
+    """
+    # Progress goes out on LangGraph's "custom" stream; the writer is thread-safe
+    # but only reachable from the graph's context, so fetch it here.
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:  # called outside a graph run
+        writer = lambda event: None
+    cancel = threading.Event()
+    try:
+        # The pipeline is thread-based (HTTP + LLM pools); keep it off the event loop
+        return await asyncio.to_thread(_deep_scrape, query, num_pages, writer, cancel)
+    except asyncio.CancelledError:
+        # The run was abandoned (e.g. the browser session went away): stop the threads too
+        cancel.set()
+        raise
+
+
 # Re-bind tools
 TOOLS = [deep_scrape_search]
 llm = llm.bind_tools(TOOLS)
@@ -195,16 +299,42 @@ SYSTEM_PROMPT = (
 )
 
 
-def chatbot_node(state: MessagesState):
-    messages = [SystemMessage(content=SYSTEM_PROMPT)] + state["messages"]
-    response = llm.invoke(messages)
-    return {"messages": state["messages"] + [response]}
+async def update_summary(previous: str, folded: list) -> str:
+    """Fold turns that left the context window into the rolling summary."""
+    prompt = f"""
+    Update the running summary of a conversation between a user and an assistant.
+    Keep the user's goals, preferences, facts they shared, and the key findings
+    (with source URLs) from earlier searches. Drop small talk and repetition.
+
+    CURRENT SUMMARY:
+    {previous or "(none)"}
+
+    NEW MESSAGES:
+    {transcript(folded)}
+    """
+    messages = [HumanMessage(content=prompt)]
+    return (await summarizer.ainvoke(messages)).content
+
+
+async def chatbot_node(state: ChatState):
+    summary = state.get("summary", "")
+    summarized = state.get("summarized", 0)
+    folded, window = plan_window(state["messages"], summarized)
+    if folded:
+        summary = await update_summary(summary, folded)
+        summarized += len(folded)
+
+    system = SYSTEM_PROMPT
+    if summary:
+        system += f"\n\nSummary of the earlier conversation:\n{summary}"
+    response = await llm.ainvoke([SystemMessage(content=system)] + window)
+    return {"messages": [response], "summary": summary, "summarized": summarized}
 
 
 # =========================
 # Build graph
 # =========================
-graph = StateGraph(MessagesState)
+graph = StateGraph(ChatState)
 graph.add_node("chatbot", chatbot_node)
 graph.add_node("tools", ToolNode(tools=TOOLS))
 
@@ -215,28 +345,33 @@ graph.add_edge("chatbot", END)
 
 
 # =========================
-# Add In-Memory Conversation History
+# Conversation History
 # =========================
-memory = MemorySaver()
+# CHECKPOINTER=sqlite (default) keeps bounded history on disk across restarts;
+# CHECKPOINTER=memory keeps everything in process memory like before.
+if os.getenv("CHECKPOINTER", "sqlite").lower() == "memory":
+    memory = MemorySaver()
+else:
+    memory = BoundedSqliteSaver()
 app = graph.compile(checkpointer=memory)
 
 
 # =========================
 # CLI runner
 # =========================
-if __name__ == "__main__":
+async def _cli():
     print("Deep-Scrape LangGraph Chatbot ready! Type 'quit' to exit.\n")
     while True:
         try:
-            user_input = input("You: ").strip()
+            user_input = (await asyncio.to_thread(input, "You: ")).strip()
         except (KeyboardInterrupt, EOFError):
             print("\nBye!")
             break
         if user_input.lower() in {"quit", "exit"}:
             break
 
-        # ✅ Pass thread_id for MemorySaver
-        for event in app.stream(
+        # ✅ Pass thread_id for the checkpointer
+        async for event in app.astream(
             {"messages": [HumanMessage(content=user_input)]},
             config={"configurable": {"thread_id": "cli-user"}}
         ):
@@ -244,3 +379,7 @@ if __name__ == "__main__":
                 msg = event["chatbot"]["messages"][-1]
                 if getattr(msg, "content", None):
                     print("\nBot:", msg.content, "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(_cli())
@@ -0,0 +1,112 @@
+# context_window.py
+"""
+Token-budgeted conversation window for the chatbot node.
+
+The prompt sent each turn is:
+
+    system prompt (+ rolling summary of older turns)
+    + the most recent whole turns that fit in HISTORY_TOKEN_BUDGET
+    + the current turn in full
+
+A "turn" starts at a HumanMessage and includes the assistant's tool calls
+and tool results, so a tool call is never separated from its result.
+Tool results of earlier turns are clipped to OLD_TOOL_TOKENS inside the
+window; their full text only matters on the turn they were fetched.
+
+Turns that fall out of the window are folded into the rolling summary
+exactly once: graph state records how many messages the summary already
+covers, so later turns only summarize what newly dropped out.
+"""
+
+import json
+from typing import List, Tuple
+
+from langchain_core.messages import AnyMessage, HumanMessage, ToolMessage
+from langgraph.graph import MessagesState
+
+from tokens import count_tokens, split_tokens
+
+HISTORY_TOKEN_BUDGET = 4000   # earlier turns kept verbatim in the prompt
+OLD_TOOL_TOKENS = 400         # tool results of earlier turns are clipped to this
+FOLD_TOOL_TOKENS = 1500       # per tool result when writing the rolling summary
+MESSAGE_OVERHEAD = 4          # role/formatting tokens per message
+
+
+class ChatState(MessagesState):
+    summary: str       # rolling summary of messages[:summarized]
+    summarized: int    # number of leading messages covered by `summary`
+
+
+def _text(message: AnyMessage) -> str:
+    content = message.content
+    return content if isinstance(content, str) else json.dumps(content)
+
+
+def _clip_tokens(text: str, max_tokens: int) -> str:
+    if count_tokens(text) <= max_tokens:
+        return text
+    return split_tokens(text, max_tokens)[0] + "\n...[truncated]"
+
+
+def message_tokens(message: AnyMessage) -> int:
+    tokens = count_tokens(_text(message)) + MESSAGE_OVERHEAD
+    for call in getattr(message, "tool_calls", None) or []:
+        tokens += count_tokens(call["name"] + json.dumps(call["args"]))
+    return tokens
+
+
+def _compact(message: AnyMessage) -> AnyMessage:
+    """Clip the result of an earlier tool call."""
+    if isinstance(message, ToolMessage):
+        return message.model_copy(update={"content": _clip_tokens(_text(message), OLD_TOOL_TOKENS)})
+    return message
+
+
+def _turn_starts(messages: List[AnyMessage], start: int) -> List[int]:
+    starts = [i for i in range(start, len(messages)) if isinstance(messages[i], HumanMessage)]
+    return starts or [start]
+
+
+def plan_window(
+    messages: List[AnyMessage],
+    summarized: int = 0,
+    token_budget: int = HISTORY_TOKEN_BUDGET,
+) -> Tuple[List[AnyMessage], List[AnyMessage]]:
+    """
+    Split the messages not yet summarized into (to_fold, window).
+    `window` is what goes in the prompt: the current turn in full plus the
+    newest earlier turns (tool results clipped) that fit in `token_budget`.
+    `to_fold` are the older messages that must be added to the summary.
+    """
+    starts = _turn_starts(messages, summarized)
+    current = starts[-1]
+    keep_from = current
+    used = 0
+    # Walk back one whole turn at a time while it still fits
+    for begin, end in zip(reversed(starts[:-1]), reversed(starts[1:])):
+        turn = [_compact(m) for m in messages[begin:end]]
+        size = sum(message_tokens(m) for m in turn)
+        if used + size > token_budget:
+            break
+        used += size
+        keep_from = begin
+
+    window = [_compact(m) for m in messages[keep_from:current]] + list(messages[current:])
+    return list(messages[summarized:keep_from]), window
+
+
+def transcript(messages: List[AnyMessage]) -> str:
+    """Plain-text rendering of messages for the summarizer."""
+    lines = []
+    for m in messages:
+        if isinstance(m, ToolMessage):
+            lines.append(f"TOOL RESULT:\n{_clip_tokens(_text(m), FOLD_TOOL_TOKENS)}")
+            continue
+        role = "USER" if isinstance(m, HumanMessage) else "ASSISTANT"
+        text = _text(m)
+        for call in getattr(m, "tool_calls", None) or []:
+            text += f"\n[called {call['name']}({json.dumps(call['args'])})]"
+        if text.strip():
+            lines.append(f"{role}: {text}")
+    return "\n\n".join(lines)
+
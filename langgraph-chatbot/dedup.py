@@ -0,0 +1,134 @@
+# dedup.py
+"""
+Near-duplicate elimination before summarization.
+
+Two passes, both keeping the first occurrence:
+- drop_repeated_lines:  exact (normalized) lines repeated within or across
+                        pages, e.g. nav/footer list items
+- drop_near_duplicates: chunks whose MinHash-estimated Jaccard similarity
+                        to an earlier chunk is at or above a threshold,
+                        e.g. syndicated copies of the same article
+"""
+
+import re
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional, Pattern
+
+import numpy as np
+
+from tokens import count_tokens
+
+SIMILARITY_THRESHOLD = 0.8   # estimated Jaccard at which chunks count as duplicates
+SHINGLE_SIZE = 5             # words per shingle
+NUM_PERMUTATIONS = 128       # MinHash signature length
+MIN_LINE_CHARS = 4           # shorter lines are never treated as boilerplate
+
+_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(1234)  # fixed seed: signatures are comparable across runs
+_A = _rng.integers(1, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+@dataclass
+class DedupReport:
+    lines_dropped: int = 0
+    chunks_dropped: int = 0
+    tokens_saved: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"dropped {self.lines_dropped} boilerplate lines and "
+            f"{self.chunks_dropped} near-duplicate chunks (~{self.tokens_saved} tokens saved)"
+        )
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+# =========================
+# Repeated lines
+# =========================
+class LineDeduper:
+    """
+    Removes every line that already appeared earlier (in this page or a
+    previous one). Lines matching `protected` (section headers etc.) and
+    very short lines are always kept. Pages can be fed one at a time.
+    """
+
+    def __init__(self, report: DedupReport, protected: Optional[Pattern] = None):
+        self.report = report
+        self.protected = protected
+        self._seen = set()
+
+    def __call__(self, page: str) -> str:
+        kept = []
+        for line in page.splitlines():
+            key = _normalize(line)
+            if len(key) < MIN_LINE_CHARS or (self.protected and self.protected.match(line.strip())):
+                kept.append(line)
+            elif key in self._seen:
+                self.report.lines_dropped += 1
+                self.report.tokens_saved += count_tokens(line)
+            else:
+                self._seen.add(key)
+                kept.append(line)
+        return "\n".join(kept)
+
+
+def drop_repeated_lines(
+    pages: List[str],
+    report: DedupReport,
+    protected: Optional[Pattern] = None,
+) -> List[str]:
+    """Apply a LineDeduper to a whole list of pages."""
+    dedupe = LineDeduper(report, protected)
+    return [dedupe(page) for page in pages]
+
+
+# =========================
+# Near-duplicate chunks
+# =========================
+def _shingle_hashes(text: str) -> np.ndarray:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64)
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """MinHash signature of the text's word shingles."""
+    hashes = _shingle_hashes(text)
+    # (a * x + b) mod p for every permutation/shingle pair, then min per permutation
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1)
+
+
+class ChunkDeduper:
+    """Accepts each chunk unless it is a near-duplicate of one already accepted."""
+
+    def __init__(self, report: DedupReport, threshold: float = SIMILARITY_THRESHOLD):
+        self.report = report
+        self.threshold = threshold
+        self._signatures = np.empty((0, NUM_PERMUTATIONS), dtype=np.uint64)
+
+    def keep(self, chunk: str) -> bool:
+        sig = minhash_signature(chunk)
+        if len(self._signatures) and (self._signatures == sig).mean(axis=1).max() >= self.threshold:
+            self.report.chunks_dropped += 1
+            self.report.tokens_saved += count_tokens(chunk)
+            return False
+        self._signatures = np.vstack([self._signatures, sig])
+        return True
+
+
+def drop_near_duplicates(
+    chunks: List[str],
+    report: DedupReport,
+    threshold: float = SIMILARITY_THRESHOLD,
+) -> List[str]:
+    """Keep each chunk unless it is a near-duplicate of one already kept."""
+    dedupe = ChunkDeduper(report, threshold)
+    return [chunk for chunk in chunks if dedupe.keep(chunk)]
@@ -0,0 +1,156 @@
+# extraction.py
+"""
+Single-pass HTML text extraction for the scrapers.
+
+Every block we care about (headlines, paragraphs, captions, list items) is
+collected in ONE walk over the document. lxml is used when it is installed;
+otherwise BeautifulSoup's built-in `html.parser` is used as a fallback.
+"""
+
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+
+    _LXML_PARSER = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True, remove_pis=True)
+    BACKEND = "lxml"
+except ImportError:  # pragma: no cover - depends on the environment
+    BACKEND = "html.parser"
+
+
+# tag -> block it belongs to
+BLOCK_TAGS = {
+    "h1": "headlines",
+    "h2": "headlines",
+    "h3": "headlines",
+    "p": "article",
+    "figcaption": "captions",
+    "li": "list_items",
+}
+BLOCKS = ("headlines", "article", "captions", "list_items")
+ARTICLE_BLOCK = "article"  # the block body text lands in; the others are often page chrome
+
+
+def _empty_blocks() -> Dict[str, List[str]]:
+    return {name: [] for name in BLOCKS}
+
+
+def _extract_lxml(html: str, separator: str) -> Dict[str, List[str]]:
+    blocks = _empty_blocks()
+    try:
+        root = lxml.html.fromstring(html.encode("utf-8"), parser=_LXML_PARSER)
+    except etree.ParserError:  # e.g. a document with no elements at all
+        return blocks
+    # Script/style text never belongs in a block (bs4 skips it as well)
+    etree.strip_elements(root, "script", "style", with_tail=False)
+
+    for el in root.iter(*BLOCK_TAGS):
+        strings = (s.strip() for s in el.itertext())
+        blocks[BLOCK_TAGS[el.tag]].append(separator.join(s for s in strings if s))
+    return blocks
+
+
+def _extract_bs4(html: str, separator: str) -> Dict[str, List[str]]:
+    blocks = _empty_blocks()
+    soup = BeautifulSoup(html, "html.parser")
+    for el in soup.find_all(list(BLOCK_TAGS)):
+        blocks[BLOCK_TAGS[el.name]].append(el.get_text(separator, strip=True))
+    return blocks
+
+
+def extract_blocks(html: str, separator: str = "") -> Dict[str, List[str]]:
+    """
+    Return the text of every headline (h1-h3), paragraph, figcaption and
+    list item in document order, grouped by block name.
+
+    `separator` joins the text nodes inside one element, like the argument
+    of BeautifulSoup's `get_text(separator, strip=True)`.
+    """
+    if not html or not html.strip():
+        return _empty_blocks()
+    if BACKEND == "lxml":
+        return _extract_lxml(html, separator)
+    return _extract_bs4(html, separator)
+
+
+# =========================
+# Incremental extraction
+# =========================
+class StreamingExtractor:
+    """
+    Extracts blocks from HTML fed in pieces, e.g. while it downloads.
+
+    With lxml the document is parsed incrementally and `done` turns True
+    once there is enough text for the clip budget: every block already
+    holds `block_chars` characters, or the article paragraphs reached
+    `max_chars` (default: twice one block's budget). Only paragraphs count
+    towards `max_chars`, so navigation menus, link lists and other
+    boilerplate ahead of the article can't end the download before the
+    article arrives. The caller can then stop downloading. Without lxml the text is
+    buffered and parsed in one go on `close()`.
+    """
+
+    def __init__(self, separator: str = "", block_chars: int = 6000, max_chars: Optional[int] = None):
+        self.separator = separator
+        self.block_chars = block_chars
+        self.max_chars = max_chars or 2 * block_chars
+        self._blocks = _empty_blocks()
+        self._chars = dict.fromkeys(BLOCKS, 0)
+        self._open: List[tuple] = []  # (element, block, slot) awaiting their end tag
+        if BACKEND == "lxml":
+            self._parser = etree.HTMLPullParser(
+                events=("start", "end"),
+                tag=(*BLOCK_TAGS, "script", "style"),
+                remove_comments=True,
+                remove_pis=True,
+            )
+        else:
+            self._buffer: List[str] = []
+
+    @property
+    def done(self) -> bool:
+        full = all(n >= self.block_chars for n in self._chars.values())
+        return full or self._chars[ARTICLE_BLOCK] >= self.max_chars
+
+    def feed(self, html: str) -> None:
+        if BACKEND == "lxml":
+            self._parser.feed(html)
+            self._drain()
+        else:
+            self._buffer.append(html)
+
+    def close(self) -> Dict[str, List[str]]:
+        if BACKEND != "lxml":
+            return extract_blocks("".join(self._buffer), self.separator)
+        try:
+            self._parser.close()
+        except etree.LxmlError:  # empty or hopelessly broken document
+            pass
+        self._drain()
+        return self._blocks
+
+    def _drain(self) -> None:
+        for event, el in self._parser.read_events():
+            if el.tag in ("script", "style"):
+                if event == "end":
+                    el.text = None  # keep script text out of the enclosing block
+                continue
+            block = BLOCK_TAGS[el.tag]
+            if event == "start":
+                # Reserve the slot now so nested blocks keep document order
+                self._blocks[block].append("")
+                self._open.append((el, block, len(self._blocks[block]) - 1))
+                continue
+            for i in range(len(self._open) - 1, -1, -1):
+                if self._open[i][0] is el:
+                    _, block, slot = self._open.pop(i)
+                    break
+            else:
+                continue
+            strings = (s.strip() for s in el.itertext())
+            text = self.separator.join(s for s in strings if s)
+            self._blocks[block][slot] = text
+            self._chars[block] += len(text)
@@ -0,0 +1,240 @@
+# fetching.py
+"""
+Concurrent page fetching for the deep-scrape pipelines.
+
+Pages are fetched on a thread pool with a global worker limit and a
+per-host limit, and the whole stage is bounded by one wall-clock deadline.
+`iter_fetch` yields pages as they complete; `fetch_all` returns them in the
+same order as the input URLs.
+
+All requests go through one pooled keep-alive session, and `fetch_text`
+consults the on-disk page cache before touching the network. Bodies are
+streamed, capped, and parsed while they download.
+"""
+
+import codecs
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Callable, Dict, Iterator, List, Tuple, TypeVar
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from extraction import StreamingExtractor
+from page_cache import PageCache
+from tracing import TRACER, Span
+
+T = TypeVar("T")
+
+MAX_WORKERS = 8         # global concurrency limit
+MAX_PER_HOST = 2        # concurrent requests to any single host
+STAGE_DEADLINE = 30.0   # seconds for the whole fetch stage
+
+MAX_BYTES = 2 * 1024 * 1024   # never download more than this per page
+READ_CHUNK_BYTES = 64 * 1024
+BLOCK_CHARS = 6000            # per-block clip budget of the scrapers
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+
+
+# =========================
+# Shared session & cache
+# =========================
+def _make_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=MAX_WORKERS * 2, pool_maxsize=MAX_WORKERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = _make_session()
+PAGE_CACHE = PageCache()
+
+
+def _charset(resp: requests.Response, head: bytes) -> str:
+    """Encoding from the Content-Type header, else a <meta charset>, else UTF-8."""
+    match = re.search(r"charset=[\"']?([\w.:-]+)", resp.headers.get("Content-Type", ""), re.I)
+    if not match:
+        match = re.search(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", head[:4096], re.I)
+    if match:
+        name = match.group(1)
+        name = name.decode("ascii", "ignore") if isinstance(name, bytes) else name
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def _read_blocks(
+    resp: requests.Response, separator: str, block_chars: int, span: Span
+) -> Dict[str, List[str]]:
+    """
+    Stream the body into the incremental extractor, stopping at MAX_BYTES
+    or as soon as the extractor has enough text. Bytes read go on `span`;
+    time spent parsing is emitted as its own "parse" span.
+    """
+    extractor = StreamingExtractor(separator, block_chars)
+    decoder = None
+    received = 0
+    parse_time = 0.0
+    for raw in resp.iter_content(chunk_size=READ_CHUNK_BYTES):
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(_charset(resp, raw))(errors="replace")
+        received += len(raw)
+        started = time.perf_counter()
+        extractor.feed(decoder.decode(raw))
+        parse_time += time.perf_counter() - started
+        if extractor.done or received >= MAX_BYTES:
+            break
+    else:
+        if decoder is not None:
+            extractor.feed(decoder.decode(b"", final=True))
+    started = time.perf_counter()
+    blocks = extractor.close()
+    parse_time += time.perf_counter() - started
+    span.set(bytes=received)
+    TRACER.record("parse", parse_time, url=resp.url, bytes=received)
+    return blocks
+
+
+def fetch_text(
+    url: str,
+    render: Callable[[Dict[str, List[str]]], str],
+    timeout: float,
+    headers: Dict[str, str],
+    separator: str = "",
+    block_chars: int = BLOCK_CHARS,
+    cache: PageCache = PAGE_CACHE,
+) -> str:
+    """
+    Return `render(blocks)` for the page at `url`, where `blocks` are the
+    extracted headlines/article/captions/list_items, going through the page
+    cache:
+    - fresh entry  -> returned without any request
+    - stale entry  -> conditional GET; a 304 reuses the cached text
+    - no entry     -> streamed GET, and the rendered text is cached
+
+    Non-HTML responses are rejected from their headers before any body is
+    read, and at most MAX_BYTES of body are ever downloaded.
+    """
+    with TRACER.span("fetch", url=url) as span:
+        cached = cache.get(url)
+        if cached and cached.is_fresh(cache.ttl):
+            span.set(cache_hit=True)
+            return cached.text
+
+        request_headers = dict(headers)
+        if cached:
+            request_headers.update(cached.conditional_headers())
+
+        with SESSION.get(url, timeout=timeout, headers=request_headers, stream=True) as resp:
+            if resp.status_code == 304 and cached:
+                cache.revalidated(url)
+                span.set(cache_hit=True, revalidated=True)
+                return cached.text
+            resp.raise_for_status()
+
+            content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in HTML_CONTENT_TYPES:
+                raise ValueError(f"not an HTML page ({content_type})")
+            length = resp.headers.get("Content-Length", "")
+            if length.isdigit() and int(length) > MAX_BYTES:
+                raise ValueError(f"page too large ({int(length)} bytes)")
+
+            blocks = _read_blocks(resp, separator, block_chars, span)
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+
+        text = render(blocks)
+        span.set(cache_hit=False, chars=len(text))
+        cache.put(url, text, etag=etag, last_modified=last_modified)
+        return text
+
+
+# =========================
+# Concurrent fetch stage
+# =========================
+def _host(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def iter_fetch(
+    urls: List[str],
+    fetch: Callable[[int, str], T],
+    fallback: Callable[[str], T],
+    max_workers: int = MAX_WORKERS,
+    max_per_host: int = MAX_PER_HOST,
+    deadline: float = STAGE_DEADLINE,
+) -> Iterator[Tuple[int, T]]:
+    """
+    Run `fetch(index, url)` for every URL concurrently and yield
+    `(index, result)` pairs as soon as each page completes. `index` is
+    1-based, matching the page numbering used in the scraped blocks.
+
+    Any page that raises, has not finished, or could not get a host slot
+    when the deadline expires is yielded as `fallback(url)`.
+    """
+    if not urls:
+        return
+
+    stop_at = time.monotonic() + deadline
+    host_slots: Dict[str, threading.BoundedSemaphore] = {}
+    slots_lock = threading.Lock()
+
+    def slot_for(url: str) -> threading.BoundedSemaphore:
+        host = _host(url)
+        with slots_lock:
+            if host not in host_slots:
+                host_slots[host] = threading.BoundedSemaphore(max_per_host)
+            return host_slots[host]
+
+    def run(index: int, url: str) -> T:
+        slot = slot_for(url)
+        remaining = stop_at - time.monotonic()
+        if remaining <= 0 or not slot.acquire(timeout=remaining):
+            return fallback(url)
+        try:
+            return fetch(index, url)
+        finally:
+            slot.release()
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls))))
+    try:
+        # Each worker runs in a copy of the caller's context so spans keep its trace id
+        futures = {
+            pool.submit(contextvars.copy_context().run, run, i, url): (i, url)
+            for i, url in enumerate(urls, start=1)
+        }
+        pending = dict(futures)
+        try:
+            for fut in as_completed(futures, timeout=max(0.0, stop_at - time.monotonic())):
+                index, url = pending.pop(fut)
+                yield index, (fut.result() if fut.exception() is None else fallback(url))
+        except FuturesTimeout:
+            pass
+
+        for index, url in sorted(pending.values()):
+            yield index, fallback(url)
+    finally:
+        # Don't block past the deadline on stragglers; their own request
+        # timeouts bound how long they keep running in the background.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_all(
+    urls: List[str],
+    fetch: Callable[[int, str], T],
+    fallback: Callable[[str], T],
+    max_workers: int = MAX_WORKERS,
+    max_per_host: int = MAX_PER_HOST,
+    deadline: float = STAGE_DEADLINE,
+) -> List[T]:
+    """Like `iter_fetch`, but wait for the whole stage and return results in input order."""
+    completed = iter_fetch(urls, fetch, fallback, max_workers, max_per_host, deadline)
+    return [result for _, result in sorted(completed, key=lambda pair: pair[0])]
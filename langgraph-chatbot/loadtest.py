@@ -0,0 +1,100 @@
+# loadtest.py
+"""
+Load test: many simulated chat sessions driving the compiled graph at once.
+
+Each session gets its own thread_id and sends `--turns` messages one after
+another; all sessions run concurrently on one event loop, like the
+Streamlit app. If graph execution serialized, throughput would stay flat
+as users are added; with the async path it should grow with the number
+of users until the model API becomes the limit.
+
+Run against the real model (needs OPENAI_API_KEY, costs tokens):
+   python loadtest.py --users 1,2,4,8 --turns 2
+
+Or with a simulated model that only sleeps, to measure the serving path:
+   python loadtest.py --users 1,2,4,8,16 --turns 3 --simulated-latency 1.0
+
+Sessions are checkpointed in memory unless CHECKPOINTER is set explicitly.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+QUESTIONS = [
+    "Give me a one-line definition of photosynthesis.",
+    "What is the capital of Canada?",
+    "Name three sorting algorithms.",
+    "Explain recursion in one sentence.",
+]
+
+
+class SimulatedLLM:
+    """Stands in for the chat model: waits `latency` seconds, never calls tools."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.latency)
+        return AIMessage(content=f"(simulated) {messages[-1].content[:60]}")
+
+
+async def run_session(app, turns: int, latencies: list) -> None:
+    config = {"configurable": {"thread_id": f"load-{uuid.uuid4()}"}}
+    for turn in range(turns):
+        start = time.perf_counter()
+        question = QUESTIONS[turn % len(QUESTIONS)]
+        async for _ in app.astream({"messages": [HumanMessage(content=question)]}, config=config):
+            pass
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_level(app, users: int, turns: int) -> None:
+    latencies: list = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_session(app, turns, latencies) for _ in range(users)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    print(
+        f"{users:5d} users  {len(latencies):4d} turns  {elapsed:7.2f} s  "
+        f"{len(latencies) / elapsed:7.2f} turns/s  "
+        f"p50 {statistics.median(latencies):5.2f} s  p95 {p95:5.2f} s"
+    )
+
+
+async def run_levels(app, levels: list, turns: int) -> None:
+    # One loop for every level, so the async HTTP client is reused throughout
+    for users in levels:
+        await run_level(app, users, turns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", default="1,2,4,8", help="comma-separated concurrent session counts")
+    parser.add_argument("--turns", type=int, default=2, help="messages per session")
+    parser.add_argument("--simulated-latency", type=float, default=None,
+                        help="replace the model with one that sleeps this many seconds")
+    args = parser.parse_args()
+
+    if args.simulated_latency is not None:
+        os.environ.setdefault("OPENAI_API_KEY", "sk-simulated")
+    # Throwaway sessions: keep their checkpoints out of the app's sqlite history
+    os.environ.setdefault("CHECKPOINTER", "memory")
+    import chatbot
+
+    if args.simulated_latency is not None:
+        chatbot.llm = chatbot.summarizer = SimulatedLLM(args.simulated_latency)
+
+    asyncio.run(run_levels(chatbot.app, [int(n) for n in args.users.split(",")], args.turns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+# pipeline.py
+"""
+Streaming scrape -> chunk -> summarize pipeline for deep_scrape_search.
+
+    iter_fetch ──> pages ──> chunks ──[bounded queue]──> summarizer workers
+    (completion order)  (line dedup,  (near-dup dedup)           │
+                         chunking)                               ▼
+                                               tree reduce once the last
+                                               summary has arrived
+
+Pages are chunked the moment they finish downloading, so the first chunks
+are already being summarized while slower pages are still in flight. The
+chunk queue is bounded: if the LLM falls behind, chunking blocks instead of
+piling text up in memory. Summaries are put back into search-result order
+before the reduce, so the result does not depend on download timing.
+
+With a `summary_budget`, only chunks relevant to the query (BM25) that fit
+the budget are summarized, which caps LLM calls per search without giving
+up the overlap: each page gets an equal share of the budget, and its best
+chunks within that share are queued as soon as the page is chunked. Chunks
+that didn't fit are held back; once every page is in, whatever budget is
+left goes to the best of them, ranked across all pages.
+
+`progress` receives a dict per event as work completes, for live UIs:
+    {"stage": "page", "page", "chunks", "pages_done", "pages_total"}
+    {"stage": "summary", "page", "chunk", "done", "queued", "text"}
+    {"stage": "merge", "summaries"}
+Setting the `cancel` event stops the run: no new page is chunked and no new
+LLM call is started, and run_pipeline raises PipelineCancelled.
+"""
+
+import contextvars
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Pattern, Tuple, TypeVar
+
+from chunking import CHUNK_TOKENS, iter_chunks
+from dedup import ChunkDeduper, DedupReport, LineDeduper
+from fetching import iter_fetch
+from ranking import bm25_scores, select_within_budget
+from summarizing import MAX_CONCURRENCY, REDUCE_TOKEN_BUDGET, reduce_summaries
+from tokens import count_tokens
+from tracing import TRACER
+
+CHUNK_QUEUE_SIZE = 8  # chunks waiting for a summarizer
+_DONE = object()
+
+# (page index, chunk index within the page)
+ChunkId = Tuple[int, int]
+Progress = Callable[[Dict[str, Any]], None]
+T = TypeVar("T")
+
+
+class PipelineCancelled(Exception):
+    """The caller set the pipeline's cancel event."""
+
+
+def _no_progress(event: Dict[str, Any]) -> None:
+    pass
+
+
+def _guard(cancel: threading.Event, fn: Callable[[str], T]) -> Callable[[str], T]:
+    """Wrap an LLM step so it refuses to start once the run is cancelled."""
+    def guarded(text: str) -> T:
+        if cancel.is_set():
+            raise PipelineCancelled()
+        return fn(text)
+    return guarded
+
+
+@dataclass
+class PipelineStats:
+    pages: int = 0
+    chunks: int = 0
+    chunks_queued: int = 0   # sent to the summarizers
+    chunks_skipped: int = 0  # dropped by relevance ranking
+    dedup: DedupReport = field(default_factory=DedupReport)
+
+
+def _chunk_stream(
+    pages: Iterator[Tuple[int, str]],
+    max_tokens: int,
+    protected: Optional[Pattern],
+    stats: PipelineStats,
+    log: Callable[[str], None],
+    progress: Progress,
+    pages_total: int,
+    cancel: threading.Event,
+) -> Iterator[Tuple[int, List[Tuple[ChunkId, str]]]]:
+    """Dedupe and chunk each page as it arrives; yields (page index, its chunks)."""
+    dedupe_lines = LineDeduper(stats.dedup, protected)
+    dedupe_chunks = ChunkDeduper(stats.dedup)
+    for page_index, page in pages:
+        if cancel.is_set():
+            raise PipelineCancelled()
+        stats.pages += 1
+        # Chunk the whole page inside the span, so time blocked on the queue isn't counted
+        with TRACER.span("chunk") as span:
+            kept = [c for c in iter_chunks(dedupe_lines(page), max_tokens) if dedupe_chunks.keep(c)]
+            span.set(chunks=len(kept), tokens=sum(count_tokens(c) for c in kept))
+        yield page_index, [((page_index, n), chunk) for n, chunk in enumerate(kept, start=1)]
+        stats.chunks += len(kept)
+        log(f"   → Page {page_index} ready: {len(kept)} chunks")
+        progress({
+            "stage": "page", "page": page_index, "chunks": len(kept),
+            "pages_done": stats.pages, "pages_total": pages_total,
+        })
+
+
+def _all_chunks(pages: Iterator[Tuple[int, List[Tuple[ChunkId, str]]]]) -> Iterator[Tuple[ChunkId, str]]:
+    for _, items in pages:
+        yield from items
+
+
+def _rank(
+    pages: Iterator[Tuple[int, List[Tuple[ChunkId, str]]]],
+    query: str,
+    token_budget: int,
+    pages_total: int,
+    stats: PipelineStats,
+    log: Callable[[str], None],
+) -> Iterator[Tuple[ChunkId, str]]:
+    """
+    Yield the chunks most relevant to `query` that fit `token_budget`:
+    each page's best chunks within its share as the page arrives, then the
+    best held-back chunks of all pages in the budget left over.
+    """
+    share = token_budget // max(pages_total, 1)
+    used = 0
+    held: List[Tuple[ChunkId, str]] = []
+    for _, items in pages:
+        texts = [chunk for _, chunk in items]
+        with TRACER.span("rank", chunks=len(texts)) as span:
+            scores = bm25_scores(query, texts)
+            kept, dropped = select_within_budget(texts, scores, min(share, token_budget - used), keep_best=False)
+            span.set(admitted=len(kept))
+        for i in kept:
+            used += count_tokens(texts[i])
+            yield items[i]
+        held.extend(items[i] for i in dropped)
+
+    # Scores are recomputed over all held chunks, so they compare across pages
+    texts = [chunk for _, chunk in held]
+    with TRACER.span("rank", chunks=len(texts)) as span:
+        scores = bm25_scores(query, texts)
+        kept, dropped = select_within_budget(texts, scores, token_budget - used, keep_best=used == 0)
+        span.set(admitted=len(kept), skipped=len(dropped))
+    for i in kept:
+        yield held[i]
+    for i in dropped:
+        (page_index, n), _ = held[i]
+        log(f"   → Skipping chunk {n} of page {page_index} (relevance {scores[i]:.2f})")
+    stats.chunks_skipped = len(dropped)
+
+
+def run_pipeline(
+    urls: List[str],
+    scrape: Callable[[int, str], str],
+    fallback: Callable[[str], str],
+    summarize_chunk: Callable[[str], str],
+    merge: Callable[[str], str],
+    protected: Optional[Pattern] = None,
+    max_tokens: int = CHUNK_TOKENS,
+    max_concurrency: int = MAX_CONCURRENCY,
+    token_budget: int = REDUCE_TOKEN_BUDGET,
+    queue_size: int = CHUNK_QUEUE_SIZE,
+    query: str = "",
+    summary_budget: Optional[int] = None,
+    log: Callable[[str], None] = print,
+    progress: Progress = _no_progress,
+    cancel: Optional[threading.Event] = None,
+) -> Tuple[str, PipelineStats]:
+    """
+    Scrape `urls`, summarize the chunks and merge the summaries.
+    Every chunk is summarized unless `summary_budget` is set, in which case
+    only the chunks most relevant to `query` that fit the budget are.
+    Returns the final summary ("" if nothing usable was scraped) and stats.
+    """
+    cancel = cancel or threading.Event()
+    summarize_chunk = _guard(cancel, summarize_chunk)
+    merge = _guard(cancel, merge)
+    stats = PipelineStats()
+    chunks: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    summaries: Dict[ChunkId, str] = {}
+    errors: List[BaseException] = []
+
+    def produce() -> None:
+        try:
+            pages = iter_fetch(urls, scrape, fallback)
+            stream = _chunk_stream(pages, max_tokens, protected, stats, log, progress, len(urls), cancel)
+            if summary_budget is None:
+                items = _all_chunks(stream)
+            else:
+                items = _rank(stream, query, summary_budget, len(urls), stats, log)
+            for item in items:
+                stats.chunks_queued += 1  # before put, so done never exceeds queued
+                chunks.put(item)
+        except BaseException as e:  # surfaced to the caller after the join
+            errors.append(e)
+        finally:
+            for _ in range(max_concurrency):
+                chunks.put(_DONE)
+
+    def summarize_worker() -> None:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                return
+            if errors:  # keep draining so the producer never blocks
+                continue
+            chunk_id, chunk = item
+            try:
+                summaries[chunk_id] = summary = summarize_chunk(chunk)
+                log(f"   → Summarized chunk {chunk_id[1]} of page {chunk_id[0]}")
+                progress({
+                    "stage": "summary", "page": chunk_id[0], "chunk": chunk_id[1],
+                    "done": len(summaries), "queued": stats.chunks_queued, "text": summary,
+                })
+            except BaseException as e:
+                errors.append(e)
+
+    # Threads run in copies of the caller's context so their spans keep its trace id
+    targets = [produce] + [summarize_worker] * max_concurrency
+    threads = [
+        threading.Thread(target=contextvars.copy_context().run, args=(target,), daemon=True)
+        for target in targets
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if cancel.is_set():
+        raise PipelineCancelled()
+    if errors:
+        raise errors[0]
+    if not summaries:
+        return "", stats
+
+    ordered = [summaries[key] for key in sorted(summaries)]
+    progress({"stage": "merge", "summaries": len(ordered)})
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        return reduce_summaries(ordered, merge, pool, token_budget, log), stats
@@ -0,0 +1,70 @@
+# ranking.py
+"""
+Local query-relevance ranking of chunks (BM25 in NumPy).
+
+Used to spend the summarization budget on the chunks that actually talk
+about the query instead of sidebars and link lists.
+"""
+
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+from search_cache import STOPWORDS
+from tokens import count_tokens
+
+SUMMARY_TOKEN_BUDGET = 12_000  # chunk tokens sent to summarize_chunk per tool call
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in re.findall(r"\w+", text.lower()) if w not in STOPWORDS]
+
+
+def bm25_scores(query: str, docs: List[str], k1: float = BM25_K1, b: float = BM25_B) -> np.ndarray:
+    """BM25 score of every document against the query."""
+    query_terms = sorted(set(_terms(query)))
+    if not docs or not query_terms:
+        return np.zeros(len(docs))
+
+    column = {term: j for j, term in enumerate(query_terms)}
+    tf = np.zeros((len(docs), len(query_terms)))
+    lengths = np.empty(len(docs))
+    for i, doc in enumerate(docs):
+        terms = _terms(doc)
+        lengths[i] = len(terms)
+        for term in terms:
+            j = column.get(term)
+            if j is not None:
+                tf[i, j] += 1
+
+    df = (tf > 0).sum(axis=0)
+    idf = np.log((len(docs) - df + 0.5) / (df + 0.5) + 1.0)
+    norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0))
+    return ((tf * (k1 + 1)) / (tf + norm[:, None]) * idf).sum(axis=1)
+
+
+def select_within_budget(
+    chunks: List[str],
+    scores: np.ndarray,
+    token_budget: int = SUMMARY_TOKEN_BUDGET,
+    keep_best: bool = True,
+) -> Tuple[List[int], List[int]]:
+    """
+    Pick the highest-scoring chunks that fit in `token_budget` tokens.
+    Returns (kept, dropped) indices, each in original order. With
+    `keep_best` the best chunk is always kept, even if it alone exceeds the
+    budget.
+    """
+    kept, dropped = [], []
+    used = 0
+    for i in np.argsort(-scores, kind="stable"):
+        size = count_tokens(chunks[i])
+        if (keep_best and not kept) or used + size <= token_budget:
+            kept.append(int(i))
+            used += size
+        else:
+            dropped.append(int(i))
+    return sorted(kept), sorted(dropped)
@@ -0,0 +1,112 @@
+# search_cache.py
+"""
+TTL cache for web search results.
+
+Queries are normalized before lookup (case, whitespace, punctuation and
+stopwords), so "Latest news on the Mars rover" and "latest news about the
+mars rover?" share one entry. Word order and directional words are kept:
+"flights from Paris to London" and "flights from London to Paris" are
+different searches. An entry fetched with
+max_results=N serves any later request for up to N results.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+DEFAULT_PATH = os.path.join(CACHE_DIR, "search.sqlite")
+DEFAULT_TTL = 30 * 60  # search results go stale quickly
+SCHEMA_VERSION = 2     # v1 keyed on sorted words
+
+STOPWORDS = {
+    "a", "an", "and", "are", "about", "as", "at", "be", "by", "for", "from",
+    "how", "in", "is", "it", "of", "on", "or", "the", "to", "what", "when",
+    "where", "which", "who", "why", "with",
+}
+# Stopwords that carry direction; dropping them would let swapped endpoints collide
+DIRECTIONAL = {"from", "to"}
+
+
+def normalize_query(query: str) -> str:
+    """Case-insensitive key for a search query; keeps word order and direction."""
+    words = re.findall(r"\w+", query.lower())
+    content = [w for w in words if w not in STOPWORDS or w in DIRECTIONAL] or words
+    return " ".join(content)
+
+
+class SearchCache:
+    """SQLite-backed search result cache keyed by normalized query."""
+
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS searches (
+                key         TEXT PRIMARY KEY,
+                query       TEXT NOT NULL,
+                max_results INTEGER NOT NULL,
+                results     TEXT NOT NULL,
+                created_at  REAL NOT NULL
+            )
+            """
+        )
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._conn.execute("DELETE FROM searches")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def get(self, query: str, max_results: int) -> Optional[List[Dict]]:
+        """Cached results for `query` if fresh and fetched with >= max_results."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT max_results, results, created_at FROM searches WHERE key = ?",
+                (normalize_query(query),),
+            ).fetchone()
+        if row is None:
+            return None
+        cached_max, results, created_at = row
+        if time.time() - created_at >= self.ttl or cached_max < max_results:
+            return None
+        return json.loads(results)[:max_results]
+
+    def put(self, query: str, max_results: int, results: List[Dict]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?, ?)",
+                (normalize_query(query), query, max_results, json.dumps(results), time.time()),
+            )
+            # Expired rows are useless; prune them whenever we write
+            self._conn.execute(
+                "DELETE FROM searches WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+
+
+SEARCH_CACHE = SearchCache()
+
+
+def cached_search(
+    query: str,
+    max_results: int,
+    search: Callable[[str, int], List[Dict]],
+    cache: SearchCache = SEARCH_CACHE,
+) -> Tuple[List[Dict], bool]:
+    """
+    Return `(results, from_cache)`. On a miss `search(query, max_results)`
+    is called and its (non-empty) results are cached.
+    """
+    results = cache.get(query, max_results)
+    if results is not None:
+        return results, True
+    results = list(search(query, max_results))
+    if results:
+        cache.put(query, max_results, results)
+    return results, False
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The chatbot's modules are top-level scripts, imported by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,57 @@
+import re
+import zlib
+
+import numpy as np
+
+from answer_cache import AnswerCache, answer_key
+
+
+def bag_of_words(text):
+    """Order-blind embedding: the worst case for word-order questions."""
+    vector = np.zeros(64, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        vector[zlib.crc32(word.encode()) % 64] += 1.0
+    return vector.tolist()
+
+
+def make_cache(tmp_path, **kwargs):
+    return AnswerCache(embed=bag_of_words, path=str(tmp_path / "answers.sqlite"), **kwargs)
+
+
+def test_key_keeps_words_and_order():
+    assert answer_key("  Who won   the Race? ") == "who won the race?"
+    assert answer_key("flights from Paris to London") != answer_key("flights from London to Paris")
+
+
+def test_exact_repeat_hits_without_embedding(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("Who won the F1 race", 3, "Verstappen")
+    cache.embed = None
+    answer, vector = cache.get("who  won the f1 RACE", 3)
+    assert answer == "Verstappen" and vector is None
+
+
+def test_reversed_direction_misses(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("flights from Paris to London", 3, "Paris -> London")
+    answer, _ = cache.get("flights from London to Paris", 3)
+    assert answer is None
+    cache.put("did Argentina beat France", 3, "yes")
+    answer, _ = cache.get("did France beat Argentina", 3)
+    assert answer is None
+
+
+def test_paraphrase_hits(tmp_path):
+    cache = make_cache(tmp_path, threshold=0.8)
+    cache.put("who won the F1 race yesterday", 3, "Verstappen")
+    answer, _ = cache.get("who won the F1 race yesterday?", 3)
+    assert answer == "Verstappen"
+    answer, _ = cache.get("who won the F1 race yesterday afternoon", 3)
+    assert answer == "Verstappen"
+
+
+def test_needs_as_many_pages(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("who won the F1 race", 3, "Verstappen")
+    answer, _ = cache.get("who won the F1 race", 5)
+    assert answer is None
@@ -0,0 +1,29 @@
+from search_cache import SearchCache, cached_search, normalize_query
+
+
+def test_equivalent_phrasings_share_a_key():
+    assert normalize_query("Latest news on the Mars rover") == normalize_query("latest news about the mars rover?")
+
+
+def test_direction_is_kept():
+    assert normalize_query("flights from Paris to London") != normalize_query("flights from London to Paris")
+    assert normalize_query("flights to London from Paris") != normalize_query("flights from London to Paris")
+
+
+def test_word_order_is_kept():
+    assert normalize_query("Argentina beat France") != normalize_query("France beat Argentina")
+
+
+def test_reversed_query_is_a_miss(tmp_path):
+    cache = SearchCache(path=str(tmp_path / "search.sqlite"))
+    calls = []
+
+    def search(query, max_results):
+        calls.append(query)
+        return [{"url": f"https://example.com/{len(calls)}"}]
+
+    cached_search("flights from Paris to London", 3, search, cache)
+    results, from_cache = cached_search("flights from London to Paris", 3, search, cache)
+    assert not from_cache and len(calls) == 2
+    results, from_cache = cached_search("Flights from Paris to London?", 3, search, cache)
+    assert from_cache and results == [{"url": "https://example.com/1"}]
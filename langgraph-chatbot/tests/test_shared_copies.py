@@ -0,0 +1,10 @@
+import os
+import subprocess
+import sys
+
+CHECK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "check_shared_copies.py")
+
+
+def test_shared_module_copies_are_identical():
+    result = subprocess.run([sys.executable, CHECK], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout
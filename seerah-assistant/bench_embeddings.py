@@ -0,0 +1,85 @@
+# bench_embeddings.py
+"""
+Bulk-indexing throughput (chunks/s) of each embedding backend in
+embedding_backends.py on the chunks of data/raheeq.pdf, split as seerah.py
+splits them.
+
+- hashing: at 1..N worker threads
+- sentence-transformers: if installed, at 1 and 2 worker threads
+- openai: only if OPENAI_API_KEY is set; cold (temporary cache), so
+  every chunk is a real API call
+
+Run:
+   python bench_embeddings.py [pdf] [--limit 2000] [--workers 1,2,4]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from dotenv import load_dotenv
+
+import embedding_backends
+from embedding_cache import CachedEmbeddings, EmbeddingStore
+from pdf_extract import load_pages
+from seerah import split_text
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "raheeq.pdf")
+
+
+def throughput(embeddings, chunks) -> tuple:
+    start = time.perf_counter()
+    vectors = embeddings.embed_documents(chunks)
+    seconds = time.perf_counter() - start
+    return seconds, len(vectors[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", default=DEFAULT_PDF)
+    parser.add_argument("--limit", type=int, default=0, help="embed at most this many chunks (0 = all)")
+    default_workers = sorted({1, 2, 4, os.cpu_count() or 1})
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="comma-separated thread counts for the hashing backend")
+    args = parser.parse_args()
+    load_dotenv()
+
+    chunks = [chunk for page in load_pages(args.pdf) for chunk in split_text(page)]
+    if args.limit:
+        chunks = chunks[:args.limit]
+    print(f"{os.path.basename(args.pdf)}: {len(chunks)} chunks, {os.cpu_count()} CPUs\n")
+
+    runs = []
+    for workers in (int(w) for w in args.workers.split(",")):
+        runs.append((f"hashing, {workers} thread(s)", lambda w=workers: embedding_backends.HashingEmbeddings(workers=w)))
+    try:
+        import sentence_transformers  # noqa: F401
+
+        for workers in (1, 2):
+            runs.append((
+                f"sentence-transformers, {workers} thread(s)",
+                lambda w=workers: embedding_backends.SentenceTransformerEmbeddings(workers=w),
+            ))
+    except ImportError:
+        print("sentence-transformers not installed; skipping the local transformer")
+    tmp = tempfile.TemporaryDirectory()
+    if os.getenv("OPENAI_API_KEY"):
+        def openai_cold():
+            cached = embedding_backends.make_embeddings("openai", os.getenv("OPENAI_API_KEY"), "text-embedding-3-small")
+            return CachedEmbeddings(cached.base, cached.model, store=EmbeddingStore(os.path.join(tmp.name, "e.sqlite")))
+
+        runs.append(("openai text-embedding-3-small, cold", openai_cold))
+    else:
+        print("OPENAI_API_KEY not set; skipping openai")
+
+    print(f"  {'backend':<40} {'dim':>5} {'seconds':>8} {'chunks/s':>10}")
+    for name, make in runs:
+        embeddings = make()
+        seconds, dim = throughput(embeddings, chunks)
+        print(f"  {name:<40} {dim:5d} {seconds:8.2f} {len(chunks) / seconds:10.1f}")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# bench_index.py
+"""
+Recall@k vs latency and memory for each FAISS index backend in
+index_backends.py, at several corpus sizes, to pick RAG_INDEX per corpus.
+
+Vectors come from (first match):
+  --vectors file.npy                  your own (n, d) float32 matrix
+  the embedding cache                 real embeddings of indexed chunks, if enough
+  synthetic clustered unit vectors    same shape as text-embedding-3-small
+
+Queries are perturbed corpus vectors; recall@k is the fraction of the exact
+flat top-k that a backend returns. Every index is written to disk and
+searched memory-mapped, as the assistants load it.
+
+Run:
+   python bench_index.py [--sizes 2000,20000] [--k 4] [--queries 200]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from typing import List
+
+import faiss
+import numpy as np
+
+from embedding_cache import DEFAULT_PATH as EMBEDDING_CACHE_PATH
+from index_backends import IndexConfig, build_index, factory_string, read_index
+
+DIM = 1536  # text-embedding-3-small
+SWEEP = [
+    IndexConfig("flat"),
+    IndexConfig("sq16"),
+    IndexConfig("ivf", nprobe=4),
+    IndexConfig("ivf", nprobe=16),
+    IndexConfig("ivf", nprobe=64),
+    IndexConfig("hnsw", ef_search=16),
+    IndexConfig("hnsw", ef_search=64),
+    IndexConfig("hnsw", ef_search=256),
+    IndexConfig("pq", nprobe=16),
+    IndexConfig("pq", nprobe=64),
+]
+
+
+def cached_vectors(limit: int) -> np.ndarray:
+    if not os.path.exists(EMBEDDING_CACHE_PATH):
+        return np.empty((0, DIM), np.float32)
+    with sqlite3.connect(EMBEDDING_CACHE_PATH) as conn:
+        rows = conn.execute("SELECT vector FROM embeddings LIMIT ?", (limit,)).fetchall()
+    vectors = [np.frombuffer(blob, dtype=np.float32) for (blob,) in rows]
+    dims = {len(v) for v in vectors}
+    if len(dims) != 1:  # several models in the cache: take none rather than mix them
+        return np.empty((0, DIM), np.float32)
+    return np.stack(vectors)
+
+
+def synthetic_vectors(n: int, dim: int, latent: int = 64, seed: int = 0) -> np.ndarray:
+    """
+    Unit vectors around ~sqrt(n) topics in a `latent`-dim subspace plus a
+    little full-rank noise: text embeddings have a low intrinsic dimension,
+    and isotropic noise would make every quantizer look far worse than it is.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(8, int(np.sqrt(n))), latent), dtype=np.float32)
+    points = centers[rng.integers(len(centers), size=n)] + 0.7 * rng.standard_normal((n, latent), dtype=np.float32)
+    basis = np.linalg.qr(rng.standard_normal((dim, latent)))[0].T.astype(np.float32)
+    vectors = points @ basis / np.sqrt(latent) + 0.05 * rng.standard_normal((n, dim), dtype=np.float32) / np.sqrt(dim)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_queries(vectors: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(len(vectors), size=count)]
+    queries = picks + 0.3 * rng.standard_normal(picks.shape, dtype=np.float32) / np.sqrt(vectors.shape[1])
+    return np.ascontiguousarray(queries / np.linalg.norm(queries, axis=1, keepdims=True), dtype=np.float32)
+
+
+def search_each(index: faiss.Index, queries: np.ndarray, k: int):
+    """One query at a time, as the retriever issues them; returns (ids, per-query seconds)."""
+    ids, times = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, found = index.search(query[None, :], k)
+        times.append(time.perf_counter() - start)
+        ids.append(found[0])
+    return np.array(ids), np.array(times)
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def bench_size(vectors: np.ndarray, queries: np.ndarray, k: int, configs: List[IndexConfig]) -> None:
+    n, dim = vectors.shape
+    exact = faiss.IndexFlatL2(dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    print(f"\n{n} vectors x {dim} dims, {len(queries)} queries, recall@{k}")
+    print(f"  {'kind':<5} {'index':<22} {'params':<10} {'build s':>8} {'load ms':>8} {'MB':>8} "
+          f"{'B/vec':>7} {'p50 ms':>7} {'p95 ms':>7} {'recall':>7}")
+    built = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for config in configs:
+            factory = factory_string(config, dim, n)
+            path = os.path.join(tmp, factory.replace(",", "_") + ".faiss")
+            if factory not in built:  # search-time parameters don't need a rebuild
+                start = time.perf_counter()
+                faiss.write_index(build_index(config, vectors), path)
+                built[factory] = time.perf_counter() - start
+            start = time.perf_counter()
+            index = read_index(path, config)
+            load_ms = (time.perf_counter() - start) * 1000
+            found, times = search_each(index, queries, k)
+            size = os.path.getsize(path)
+            params = (f"nprobe={config.nprobe}" if factory.startswith("IVF")
+                      else f"ef={config.ef_search}" if factory.startswith("HNSW") else "")
+            print(f"  {config.kind:<5} {factory:<22} {params:<10} {built[factory]:8.2f} {load_ms:8.1f} {size / 2**20:8.1f} "
+                  f"{size / n:7.0f} {np.percentile(times, 50) * 1000:7.3f} "
+                  f"{np.percentile(times, 95) * 1000:7.3f} {recall(found, truth):7.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="2000,20000", help="comma-separated corpus sizes")
+    parser.add_argument("--k", type=int, default=4, help="retriever k (seerah.py uses 4)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--vectors", help="(n, d) float32 .npy file to use instead of cached/synthetic vectors")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    if args.vectors:
+        pool, origin = np.load(args.vectors).astype(np.float32), args.vectors
+    else:
+        pool, origin = cached_vectors(max(sizes)), "embedding cache"
+        if len(pool) < max(sizes):
+            pool, origin = synthetic_vectors(max(sizes), DIM), "synthetic"
+    print(f"Vectors: {origin}; {faiss.omp_get_max_threads()} FAISS threads")
+
+    for n in sizes:
+        if n > len(pool):
+            print(f"\nSkipping {n}: only {len(pool)} vectors available")
+            continue
+        vectors = np.ascontiguousarray(pool[:n])
+        bench_size(vectors, make_queries(vectors, args.queries), args.k, SWEEP)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# bench_pdf.py
+"""
+Benchmark PDF text extraction on data/raheeq.pdf: the old serial
+load_pdf_text (extract_text() twice per page, `text +=`) against the
+pdf_extract engine with 1..N worker processes, and a warm-cache run.
+
+Run:
+   python bench_pdf.py [pdf] [--workers 1,2,4,8] [--skip-legacy]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pdfplumber
+
+import pdf_extract
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "raheeq.pdf")
+
+
+def legacy_load_pdf_text(pdf_path: str) -> str:
+    """The original seerah.py implementation."""
+    text = ""
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            if page.extract_text():
+                text += page.extract_text() + "\n"
+    return text
+
+
+def timed(fn) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", default=DEFAULT_PDF)
+    default_workers = sorted({1, 2, 4, os.cpu_count() or 1})
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="comma-separated worker counts")
+    parser.add_argument("--skip-legacy", action="store_true", help="skip the slow original implementation")
+    args = parser.parse_args()
+
+    with pdfplumber.open(args.pdf) as pdf:
+        pages = len(pdf.pages)
+    print(f"{os.path.basename(args.pdf)}: {pages} pages, {os.cpu_count()} CPUs\n")
+
+    rows = []
+    reference = None
+    if not args.skip_legacy:
+        seconds, reference = timed(lambda: legacy_load_pdf_text(args.pdf))
+        rows.append(("legacy serial (2x extract, +=)", seconds))
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        seconds, text = timed(lambda: pdf_extract.load_text(args.pdf, workers=workers, use_cache=False))
+        if reference is not None:
+            assert text == reference, "extraction output differs from the legacy implementation"
+        reference = reference or text
+        rows.append((f"pdf_extract, {workers} worker(s)", seconds))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = pdf_extract.PageTextCache(os.path.join(tmp, "pages.sqlite"))
+        cold, _ = timed(lambda: list(pdf_extract.iter_pages(args.pdf, cache=cache)))
+        warm, _ = timed(lambda: list(pdf_extract.iter_pages(args.pdf, cache=cache)))
+    rows.append(("pdf_extract, cold cache (default workers)", cold))
+    rows.append(("pdf_extract, warm cache", warm))
+
+    baseline = rows[0][1]
+    for name, seconds in rows:
+        print(f"  {name:<44} {seconds:8.2f} s  {pages / seconds:8.1f} pages/s  x{baseline / seconds:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# embedding_cache.py
+"""
+Batched, concurrent embedding with a persistent per-text vector cache.
+
+CachedEmbeddings wraps any LangChain Embeddings object (e.g.
+OpenAIEmbeddings) and is itself an Embeddings, so FAISS and retrievers use
+it unchanged:
+
+- every text is looked up in an on-disk cache keyed by (model, sha256 of
+  the text); vectors are stored as raw float32 blobs
+- the remaining texts are de-duplicated and packed into batches of at most
+  `batch_tokens` tokens / `batch_size` texts
+- batches are embedded concurrently, retrying rate limits and transient
+  server errors with exponential backoff (honouring Retry-After)
+
+The cache lives outside the project folders by default, so both assistants,
+re-runs and chunk-size experiments share it: only text that was never
+embedded with that model costs an API call.
+"""
+
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "agentic-ai", "embeddings.sqlite"),
+)
+BATCH_TOKENS = 100_000   # per request (OpenAI allows 300k tokens / 2048 inputs)
+BATCH_SIZE = 512
+MAX_CONCURRENCY = 4
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0       # seconds; doubles per retry, with jitter
+BACKOFF_MAX = 60.0
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")  # text-embedding-3 / ada-002
+except Exception:  # pragma: no cover - tiktoken missing or offline
+    _ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# =========================
+# On-disk vector store
+# =========================
+class EmbeddingStore:
+    """SQLite table of float32 vectors keyed by (model, text hash)."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model  TEXT NOT NULL,
+                key    TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, key)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, keys: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):  # stay under SQLite's variable limit
+                batch = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(batch))})",
+                    [model, *batch],
+                ).fetchall()
+                found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                [(model, key, np.asarray(v, dtype=np.float32).tobytes()) for key, v in items.items()],
+            )
+            self._conn.commit()
+
+
+# =========================
+# Retry policy
+# =========================
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Server-suggested wait from a Retry-After header, if any."""
+    response = getattr(error, "response", None)
+    value = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _is_retryable(error: BaseException) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    # Connection problems and timeouts carry no status code
+    name = type(error).__name__
+    return any(word in name for word in ("RateLimit", "Timeout", "Connection"))
+
+
+# =========================
+# Embeddings wrapper
+# =========================
+class CachedEmbeddings(Embeddings):
+    def __init__(
+        self,
+        base: Embeddings,
+        model: str,
+        store: Optional[EmbeddingStore] = None,
+        batch_tokens: int = BATCH_TOKENS,
+        batch_size: int = BATCH_SIZE,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.base = base
+        self.model = model
+        self.store = store or EmbeddingStore()
+        self.batch_tokens = batch_tokens
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.hits = 0
+        self.misses = 0
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        """Pack texts into batches bounded by both token count and size."""
+        batches: List[List[str]] = []
+        current: List[str] = []
+        used = 0
+        for text in texts:
+            size = count_tokens(text)
+            if current and (used + size > self.batch_tokens or len(current) >= self.batch_size):
+                batches.append(current)
+                current, used = [], 0
+            current.append(text)
+            used += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.base.embed_documents(batch)
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    raise
+                wait = _retry_after(e) or min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+                time.sleep(wait * random.uniform(1.0, 1.25))
+        raise AssertionError("unreachable")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [text_key(t) for t in texts]
+        cached = self.store.get_many(self.model, list(set(keys)))
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - sum(1 for key in keys if key in missing)
+        self.misses += len(missing)
+
+        if missing:
+            batches = self._batches(list(missing.values()))
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_concurrency, len(batches)))) as pool:
+                for batch, vectors in zip(batches, pool.map(self._embed_batch, batches)):
+                    fresh = {text_key(t): np.asarray(v, dtype=np.float32) for t, v in zip(batch, vectors)}
+                    self.store.put_many(self.model, fresh)  # persist as we go: a crash keeps finished batches
+                    cached.update(fresh)
+        return [cached[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
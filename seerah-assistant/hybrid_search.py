@@ -0,0 +1,189 @@
+# hybrid_search.py
+"""
+Hybrid BM25 + vector retrieval for the RAG assistants.
+
+Vector search misses exact-term matches that matter for name- and
+date-heavy questions ("Battle of Badr", "year 8 AH"), so the retriever runs
+both searches and fuses them with reciprocal-rank fusion:
+
+    score(doc) = sum over result lists of 1 / (RRF_K + rank)
+
+- BM25Index is a term-major (CSC) SciPy matrix of precomputed BM25 weights;
+  a query sums the columns of its terms, so scoring costs O(postings of
+  the query terms) and never touches the rest of the corpus
+- it is built from the vector store's docstore when the index is saved and
+  persisted next to it (bm25.npz + bm25.json)
+- an optional local cross-encoder (sentence-transformers) re-ranks the
+  fused candidates; it is off by default because it costs tens of ms per
+  query on CPU, while BM25 + FAISS + fusion stay in single-digit ms
+
+Query embedding is not included in that figure: with CachedEmbeddings a
+repeated question is a SQLite lookup, a new one is one API round trip.
+"""
+
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from scipy import sparse
+
+BM25_MATRIX_FILE = "bm25.npz"
+BM25_META_FILE = "bm25.json"
+BM25_VERSION = 1
+K1 = 1.5
+B = 0.75
+RRF_K = 60       # standard RRF constant; damps the weight of the very top ranks
+FETCH_K = 20     # candidates taken from each retriever before fusion
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+_TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from had has have he her his how i in is it its of on or "
+    "she that the their them they this to was were what when where which who whom why will with you".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens with diacritics folded (Muḥammad -> muhammad) and stopwords dropped."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return [t for t in _TOKEN.findall(folded) if t not in STOPWORDS]
+
+
+# =========================
+# Sparse BM25 index
+# =========================
+class BM25Index:
+    """BM25 over a fixed set of documents, keyed by docstore id."""
+
+    def __init__(self, weights: sparse.csc_matrix, vocabulary: Dict[str, int], ids: List[str]):
+        self.weights = weights          # (documents, terms), BM25 weight per posting
+        self.vocabulary = vocabulary    # term -> column
+        self.ids = ids                  # row -> docstore id
+
+    @classmethod
+    def build(cls, ids: Sequence[str], texts: Sequence[str], k1: float = K1, b: float = B) -> "BM25Index":
+        vocabulary: Dict[str, int] = {}
+        rows, cols, tfs, lengths = [], [], [], []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                rows.append(row)
+                cols.append(vocabulary.setdefault(term, len(vocabulary)))
+                tfs.append(tf)
+        n = len(texts)
+        rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+        tfs, lengths = np.asarray(tfs, dtype=np.float32), np.asarray(lengths, dtype=np.float32)
+
+        df = np.bincount(cols, minlength=len(vocabulary)).astype(np.float32)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * lengths / max(float(lengths.mean()) if n else 0.0, 1.0))
+        weights = idf[cols] * tfs * (k1 + 1) / (tfs + norm[rows])
+        matrix = sparse.csc_matrix((weights, (rows, cols)), shape=(n, len(vocabulary)), dtype=np.float32)
+        return cls(matrix, vocabulary, list(ids))
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top-k (docstore id, score) for `query`; documents sharing no term are never returned."""
+        cols = [self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary]
+        if not cols:
+            return []
+        scores = np.asarray(self.weights[:, cols].sum(axis=1)).ravel()
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self.ids[i], float(scores[i])) for i in hits]
+
+    def save(self, directory: str) -> None:
+        sparse.save_npz(os.path.join(directory, BM25_MATRIX_FILE), self.weights, compressed=False)
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        with open(os.path.join(directory, BM25_META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"version": BM25_VERSION, "vocabulary": terms, "ids": self.ids}, f)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["BM25Index"]:
+        """The saved index, or None if it is missing or from another version."""
+        try:
+            with open(os.path.join(directory, BM25_META_FILE), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != BM25_VERSION:
+                return None
+            weights = sparse.load_npz(os.path.join(directory, BM25_MATRIX_FILE)).tocsc()
+        except (OSError, ValueError):
+            return None
+        return cls(weights, {term: col for col, term in enumerate(meta["vocabulary"])}, meta["ids"])
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore) -> "BM25Index":
+        """Index every document of a LangChain FAISS store, in index order."""
+        ids = list(vectorstore.index_to_docstore_id.values())
+        return cls.build(ids, [vectorstore.docstore.search(i).page_content for i in ids])
+
+
+# =========================
+# Fusion and re-ranking
+# =========================
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], rrf_k: int = RRF_K) -> List[str]:
+    """Ids ordered by summed 1 / (rrf_k + rank) over all rankings (rank starts at 1)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class CrossEncoderReranker:
+    """Local cross-encoder relevance model; needs `pip install sentence-transformers`."""
+
+    def __init__(self, model: str = RERANK_MODEL):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model, device="cpu")
+
+    def rerank(self, query: str, texts: List[str]) -> List[int]:
+        """Positions of `texts`, most relevant first."""
+        scores = self.model.predict([(query, text) for text in texts], batch_size=len(texts) or 1)
+        return list(np.argsort(-np.asarray(scores), kind="stable"))
+
+
+def reranker_from_env() -> Optional[CrossEncoderReranker]:
+    """RAG_RERANK=1 (default model) or a sentence-transformers cross-encoder name; unset = off."""
+    value = os.getenv("RAG_RERANK", "").strip()
+    if value.lower() in ("", "0", "false", "off"):
+        return None
+    return CrossEncoderReranker(RERANK_MODEL if value.lower() in ("1", "true", "on") else value)
+
+
+# =========================
+# Retriever
+# =========================
+class HybridRetriever(BaseRetriever):
+    """FAISS + BM25 fused with RRF, optionally re-ranked; a drop-in for vectorstore.as_retriever()."""
+
+    vectorstore: VectorStore
+    bm25: BM25Index
+    k: int = 4
+    fetch_k: int = FETCH_K
+    rrf_k: int = RRF_K
+    reranker: Optional[CrossEncoderReranker] = None
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        vector_docs = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        keyword_ids = [doc_id for doc_id, _ in self.bm25.search(query, self.fetch_k)]
+        fused = reciprocal_rank_fusion([[doc.id for doc in vector_docs], keyword_ids], self.rrf_k)
+        by_id = {doc.id: doc for doc in vector_docs}
+        docs = [by_id.get(doc_id) or self.vectorstore.docstore.search(doc_id) for doc_id in fused[: self.fetch_k]]
+        if self.reranker is not None and docs:
+            docs = [docs[i] for i in self.reranker.rerank(query, [d.page_content for d in docs])]
+        return docs[: self.k]
@@ -0,0 +1,128 @@
+# index_backends.py
+"""
+FAISS index backends for the RAG vector store.
+
+    kind   index                      memory / vector (d dims)   notes
+    flat   exact L2                   4d bytes                   default, exact
+    sq16   float16 scalar quantizer   2d bytes                   ~exact, half the memory
+    ivf    IVF + flat lists           4d bytes                   probes `nprobe` of `nlist` lists
+    hnsw   HNSW graph                 4d + ~8*M bytes            fastest queries, most memory
+    pq     IVF + product quantizer    `pq_m` bytes               smallest, lossy
+
+The exact flat index stays the store of record (it supports add and
+remove, which HNSW and trained IVF/PQ indexes don't do cheaply); the chosen
+backend is built from its vectors whenever the index changes, and loaded
+memory-mapped so the OS pages it in on demand.
+
+Select with RAG_INDEX=flat|sq16|ivf|hnsw|pq. Indexes too small to train a
+backend fall back to a simpler one. See bench_index.py for recall@k vs
+latency and memory to pick a setting per corpus size.
+"""
+
+import math
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+import faiss
+import numpy as np
+
+KINDS = ("flat", "sq16", "ivf", "hnsw", "pq")
+MIN_POINTS_PER_LIST = 39      # FAISS k-means wants >= 39 training points per centroid
+PQ_CODEBOOK_POINTS = 256 * 39  # 8-bit PQ: 256 centroids per sub-quantizer
+
+
+@dataclass
+class IndexConfig:
+    kind: str = "flat"
+    nlist: Optional[int] = None   # IVF lists; default ~4*sqrt(n)
+    nprobe: int = 16              # IVF lists searched per query
+    hnsw_m: int = 32              # HNSW graph degree
+    ef_search: int = 64           # HNSW candidate list size at query time
+    pq_m: Optional[int] = None    # PQ bytes per vector; default d/16 (must divide d)
+    mmap: bool = True             # memory-map the serving index when loading
+
+    def __post_init__(self):
+        if self.kind not in KINDS:
+            raise ValueError(f"unknown index kind {self.kind!r}; expected one of {KINDS}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def config_from_env() -> IndexConfig:
+    return IndexConfig(kind=os.getenv("RAG_INDEX", "flat").lower())
+
+
+def _nlist(config: IndexConfig, n: int) -> int:
+    nlist = config.nlist or int(4 * math.sqrt(n))
+    return max(1, min(nlist, n // MIN_POINTS_PER_LIST))
+
+
+def _pq_m(config: IndexConfig, dim: int) -> int:
+    m = config.pq_m or max(1, dim // 16)
+    while dim % m:  # sub-quantizers must split the vector evenly
+        m -= 1
+    return m
+
+
+def factory_string(config: IndexConfig, dim: int, n: int) -> str:
+    """FAISS index_factory description for `n` vectors, falling back when n is too small to train."""
+    kind = config.kind
+    if kind == "pq" and n < PQ_CODEBOOK_POINTS:
+        kind = "sq16"
+    if kind in ("ivf", "pq") and _nlist(config, n) < 2:
+        kind = "flat"
+    if kind == "flat":
+        return "Flat"
+    if kind == "sq16":
+        return "SQfp16"
+    if kind == "hnsw":
+        return f"HNSW{config.hnsw_m}"
+    if kind == "ivf":
+        return f"IVF{_nlist(config, n)},Flat"
+    return f"IVF{_nlist(config, n)},PQ{_pq_m(config, dim)}x8"
+
+
+def apply_search_params(index: faiss.Index, config: IndexConfig) -> None:
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(config.nprobe, ivf.nlist)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = config.ef_search
+
+
+def build_index(config: IndexConfig, vectors: np.ndarray) -> faiss.Index:
+    """Train (if needed) and fill an L2 index of the configured kind with `vectors`, in order."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    index = faiss.index_factory(dim, factory_string(config, dim, n), faiss.METRIC_L2)
+    if isinstance(index, faiss.IndexIVFPQ):
+        index.do_polysemous_training = False  # ~10x the training time, only pays off for polysemous search
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    apply_search_params(index, config)
+    return index
+
+
+def flat_vectors(index: faiss.Index) -> np.ndarray:
+    """All vectors of an exact index, in id order."""
+    return index.reconstruct_n(0, index.ntotal) if index.ntotal else np.empty((0, index.d), np.float32)
+
+
+# Maps the vector storage of every index type (plain IO_FLAG_MMAP only maps IVF lists)
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def read_index(path: str, config: IndexConfig) -> faiss.Index:
+    """Load a saved index; memory-mapped indexes are read-only and paged in by the OS on demand."""
+    flags = MMAP_FLAGS if config.mmap else 0
+    index = faiss.read_index(path, flags)
+    apply_search_params(index, config)
+    return index
+
+
+def index_bytes(index: faiss.Index) -> int:
+    """Serialized size: what the index costs on disk and, once paged in, in memory."""
+    return int(faiss.serialize_index(index).size)
@@ -0,0 +1,171 @@
+# pdf_extract.py
+"""
+Parallel, cached PDF text extraction shared by seerah.py and read-book.py.
+
+- the page range is split into contiguous slices that run on a process pool
+  (pdfplumber is pure Python, so threads would serialize on the GIL); each
+  worker opens the PDF once and extracts every page of its slice once
+- pages are yielded in order as soon as the slices covering them finish,
+  so callers can start splitting before the whole book is read
+- extracted text is cached on disk per (file SHA-256, page number); a
+  re-run only extracts pages that are not cached yet
+
+    for number, text in iter_pages("data/raheeq.pdf"):
+        ...
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pdfplumber
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, "pdf_pages.sqlite")
+PAGES_PER_SLICE = 16     # small enough to balance load and stream early
+MIN_PARALLEL_PAGES = 32  # below this a process pool costs more than it saves
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PageTextCache:
+    """SQLite cache of extracted page text keyed by (file hash, page number)."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                file_hash TEXT PRIMARY KEY,
+                pages     INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                file_hash TEXT NOT NULL,
+                page      INTEGER NOT NULL,
+                text      TEXT NOT NULL,
+                PRIMARY KEY (file_hash, page)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def page_count(self, file_hash: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute("SELECT pages FROM files WHERE file_hash = ?", (file_hash,)).fetchone()
+        return row[0] if row else None
+
+    def set_page_count(self, file_hash: str, pages: int) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?)", (file_hash, pages))
+            self._conn.commit()
+
+    def get_pages(self, file_hash: str) -> Dict[int, str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT page, text FROM pages WHERE file_hash = ?", (file_hash,)).fetchall()
+        return dict(rows)
+
+    def put_pages(self, file_hash: str, pages: Dict[int, str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                [(file_hash, number, text) for number, text in pages.items()],
+            )
+            self._conn.commit()
+
+
+PAGE_TEXT_CACHE = PageTextCache()
+
+
+def _extract_slice(path: str, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop) (0-based); runs in a worker process."""
+    texts = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[start:stop]:
+            texts.append(page.extract_text() or "")
+            page.close()  # drop the parsed layout objects
+    return texts
+
+
+def _slices(missing: List[int], size: int) -> List[Tuple[int, int]]:
+    """Group sorted 0-based page numbers into contiguous [start, stop) runs of at most `size`."""
+    slices: List[Tuple[int, int]] = []
+    for number in missing:
+        if slices and slices[-1][1] == number and number - slices[-1][0] < size:
+            slices[-1] = (slices[-1][0], number + 1)
+        else:
+            slices.append((number, number + 1))
+    return slices
+
+
+def iter_pages(
+    path: str,
+    workers: Optional[int] = None,
+    cache: Optional[PageTextCache] = PAGE_TEXT_CACHE,
+    pages_per_slice: int = PAGES_PER_SLICE,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield `(page_number, text)` for every page in order (1-based; text is
+    "" for pages without a text layer). `workers` defaults to the CPU count;
+    `cache=None` extracts everything without reading or writing the cache.
+    """
+    file_hash = file_sha256(path) if cache is not None else None
+    total = cache.page_count(file_hash) if cache is not None else None
+    if total is None:
+        with pdfplumber.open(path) as pdf:
+            total = len(pdf.pages)
+        if cache is not None:
+            cache.set_page_count(file_hash, total)
+
+    cached = cache.get_pages(file_hash) if cache is not None else {}
+    missing = [n for n in range(total) if n + 1 not in cached]
+    slices = _slices(missing, pages_per_slice)
+    workers = workers or os.cpu_count() or 1
+
+    def emit_ready(upto: int, next_page: int) -> Iterator[Tuple[int, str]]:
+        while next_page < upto:
+            next_page += 1
+            yield next_page, cached[next_page]
+
+    next_page = 0  # pages 1..next_page have been yielded
+    if workers == 1 or len(missing) < MIN_PARALLEL_PAGES:
+        for start, stop in slices:
+            texts = dict(zip(range(start + 1, stop + 1), _extract_slice(path, start, stop)))
+            cached.update(texts)
+            if cache is not None:
+                cache.put_pages(file_hash, texts)
+            yield from emit_ready(stop, next_page)
+            next_page = stop
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(slices))) as pool:
+            futures = [pool.submit(_extract_slice, path, start, stop) for start, stop in slices]
+            for (start, stop), future in zip(slices, futures):
+                texts = dict(zip(range(start + 1, stop + 1), future.result()))
+                cached.update(texts)
+                if cache is not None:
+                    cache.put_pages(file_hash, texts)
+                yield from emit_ready(stop, next_page)
+                next_page = stop
+    yield from emit_ready(total, next_page)
+
+
+def load_pages(path: str, workers: Optional[int] = None, use_cache: bool = True) -> List[str]:
+    """Text of every page, in order."""
+    cache = PAGE_TEXT_CACHE if use_cache else None
+    return [text for _, text in iter_pages(path, workers, cache)]
+
+
+def load_text(path: str, workers: Optional[int] = None, use_cache: bool = True) -> str:
+    """Whole-document text: non-empty pages, each followed by a newline."""
+    return "".join(text + "\n" for text in load_pages(path, workers, use_cache) if text)
+
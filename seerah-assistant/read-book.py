@@ -8,7 +8,7 @@ Setup:
     OPENAI_API_KEY=your_openai_api_key_here
 
 2. Install dependencies:
-    pip install langchain-community openai python-dotenv tiktoken PyPDF2
+    pip install langchain-community openai python-dotenv tiktoken pdfplumber
 """
 
 import os
@@ -17,7 +17,9 @@ from dotenv import load_dotenv
 from langchain_community.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from PyPDF2 import PdfReader
+
+from llm_cache import LLM_CACHE
+from pdf_extract import load_text
 
 # ------------------------------
 # Load environment variables
@@ -32,13 +34,8 @@ if not api_key:
 # ------------------------------
 def load_pdf(file_path: str) -> str:
     try:
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-        return text
+        # Shared with seerah.py: pages extracted once, in parallel, cached on disk
+        return load_text(file_path)
     except Exception as e:
         print(f"Error reading PDF: {e}")
         return ""
@@ -56,8 +53,8 @@ def split_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 200):
 # ------------------------------
 # Function to generate Q&A pairs
 # ------------------------------
-def generate_qa_pairs(chunk: str, model_name: str = "gpt-4") -> list:
-    chat = ChatOpenAI(model_name=model_name, openai_api_key=api_key, temperature=0.7)
+def generate_qa_pairs(chunk: str, model_name: str = "gpt-4", temperature: float = 0.7) -> list:
+    chat = ChatOpenAI(model_name=model_name, openai_api_key=api_key, temperature=temperature)
 
     prompt_template = """
     You are an AI tutor. Generate 3 high-quality question-answer pairs
@@ -75,19 +72,25 @@ def generate_qa_pairs(chunk: str, model_name: str = "gpt-4") -> list:
     """
     prompt = ChatPromptTemplate.from_template(prompt_template)
 
-    try:
-        response = chat.invoke(prompt.format_messages(text=chunk))
+    messages = prompt.format_messages(text=chunk)
+
+    def call_llm() -> str:
+        response = chat.invoke(messages)
 
         # Extract text safely
         if hasattr(response, "content"):
-            content = response.content
-        else:
-            content = str(response)
+            return response.content
+        return str(response)
+
+    try:
+        content = LLM_CACHE.cached_call(model_name, temperature, messages, call_llm)
 
         # Parse JSON safely
         qa_list = json.loads(content)
         return [{"user": qa["question"], "assistant": qa["answer"]} for qa in qa_list]
     except Exception as e:
+        # Don't keep serving a response we couldn't parse
+        LLM_CACHE.discard(model_name, temperature, messages)
         print(f"Error generating/parsing Q&A: {e}")
         return []
 
@@ -132,6 +135,7 @@ def main():
 
     print(f"Saving Q&A pairs to {output_file}...")
     save_to_jsonl(all_qa_pairs, output_file)
+    print(f"LLM cache: {LLM_CACHE.stats()}")
     print("Done!")
 
 # ------------------------------
@@ -11,36 +11,54 @@ Steps:
 
 3. Run:
    python seerah.py
+
+   RAG_INDEX=flat|sq16|ivf|hnsw|pq picks the FAISS index backend (see
+   index_backends.py and bench_index.py); the default is exact search.
+   Retrieval is hybrid BM25 + vector (hybrid_search.py); RAG_RERANK=1
+   re-ranks with a local cross-encoder (needs sentence-transformers).
+   EMBEDDING_BACKEND=openai|hashing|sentence-transformers picks the
+   embedder (embedding_backends.py); with a local one,
+   `python seerah.py --index-only` indexes offline, without an API key.
 """
 
+import argparse
 import os
 from dotenv import load_dotenv
-import pdfplumber
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
 from langchain_community.vectorstores import FAISS
 from langchain.chains import RetrievalQA
 
+from embedding_backends import make_embeddings as make_backend_embeddings
+from hybrid_search import BM25Index, HybridRetriever, reranker_from_env
+from index_backends import IndexConfig, build_index, config_from_env, flat_vectors
+from pdf_extract import load_pages, load_text
+from vector_index import IncrementalIndex
+
 # ------------------------------
 # Load API key
 # ------------------------------
 load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in .env file")
+api_key = os.getenv("OPENAI_API_KEY")  # checked where OpenAI is used, so local indexing works offline
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+EMBEDDING_MODEL = "text-embedding-3-small"
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".index", "seerah")
+DEFAULT_PDF = "data/raheeq.pdf"
 
 
 # ------------------------------
 # 1. Load PDF text
 # ------------------------------
+def load_pdf_pages(pdf_path: str) -> list:
+    """Text of every page (empty string for pages without text); parallel and cached."""
+    return load_pages(pdf_path)
+
+
 def load_pdf_text(pdf_path: str) -> str:
-    text = ""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            if page.extract_text():
-                text += page.extract_text() + "\n"
-    return text
+    return load_text(pdf_path)
 
 
 # ------------------------------
@@ -48,8 +66,8 @@ def load_pdf_text(pdf_path: str) -> str:
 # ------------------------------
 def split_text(text: str):
     splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
     )
     return splitter.split_text(text)
 
@@ -57,24 +75,62 @@ def split_text(text: str):
 # ------------------------------
 # 3. Build vectorstore
 # ------------------------------
-def build_vectorstore(chunks):
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-small",
-        api_key=api_key
+def make_embeddings():
+    # EMBEDDING_BACKEND selects OpenAI (default) or a local CPU backend
+    return make_backend_embeddings(api_key=api_key, openai_model=EMBEDDING_MODEL)
+
+
+def build_vectorstore(chunks, embeddings=None, index_config: IndexConfig = None):
+    vectorstore = FAISS.from_texts(chunks, embeddings or make_embeddings())
+    index_config = index_config or config_from_env()
+    if index_config.kind != "flat":
+        vectorstore.index = build_index(index_config, flat_vectors(vectorstore.index))
+    return vectorstore
+
+
+def load_index(pdf_paths) -> IncrementalIndex:
+    """
+    Saved index covering `pdf_paths`, updated incrementally: only chunks of
+    new or edited pages are embedded, and removed ones are deleted. PDFs
+    indexed by earlier runs stay in the index.
+    """
+    embeddings = make_embeddings()
+    index = IncrementalIndex(
+        INDEX_DIR,
+        embeddings,
+        settings={
+            "splitter": {"type": "recursive_character", "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP},
+            "embedding_model": embeddings.model,
+        },
+        index_config=config_from_env(),
     )
-    return FAISS.from_texts(chunks, embeddings)
+    for pdf_path in pdf_paths:
+        report = index.sync(pdf_path, load_pdf_pages, split_text)
+        print(f"Index: {report}")
+    if index.changed:
+        index.save()
+        print(f"Embeddings: {index.embeddings.stats()}")
+    return index
 
 
 # ------------------------------
 # 4. Create QA chain
 # ------------------------------
-def make_qa_chain(vectorstore):
+def make_qa_chain(vectorstore, bm25: BM25Index = None):
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in .env file")
     llm = ChatOpenAI(
         model="gpt-4o-mini",
         temperature=0,
         api_key=api_key
     )
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
+    # BM25 catches exact names and dates that vector search ranks low
+    retriever = HybridRetriever(
+        vectorstore=vectorstore,
+        bm25=bm25 or BM25Index.from_vectorstore(vectorstore),
+        k=4,
+        reranker=reranker_from_env(),
+    )
     return RetrievalQA.from_chain_type(llm=llm, retriever=retriever)
 
 
@@ -82,11 +138,15 @@ def make_qa_chain(vectorstore):
 # Main
 # ------------------------------
 if __name__ == "__main__":
-    pdf_file = "data/raheeq.pdf"  # change to your PDF path
-    text = load_pdf_text(pdf_file)
-    chunks = split_text(text)
-    vectorstore = build_vectorstore(chunks)
-    qa = make_qa_chain(vectorstore)
+    parser = argparse.ArgumentParser(description="Seerah RAG assistant")
+    parser.add_argument("pdfs", nargs="*", default=[DEFAULT_PDF], help="PDFs to index (added to the saved index)")
+    parser.add_argument("--index-only", action="store_true", help="update the saved index and exit")
+    args = parser.parse_args()
+
+    index = load_index(args.pdfs)
+    if args.index_only:
+        raise SystemExit(0)
+    qa = make_qa_chain(index.vectorstore, index.bm25)
 
     print("\nSeerah Assistant ready! Type 'exit' to quit.\n")
     while True:
@@ -0,0 +1,287 @@
+# vector_index.py
+"""
+Persisted, incrementally updated FAISS index.
+
+Building a vector store means extracting the PDF, splitting it and
+embedding every chunk -- minutes and API spend on every start. Instead the
+index is saved next to a manifest describing exactly what went into it:
+
+    {
+      "settings": {"splitter": {...}, "embedding_model": ...},
+      "sources": {
+        "<real path of the pdf>": {"sha256": ..., "pages": [{"hash": ..., "chunks": [chunk ids]}]}
+      }
+    }
+
+Syncing a source then only does the work that changed:
+- file hash unchanged      -> nothing is extracted, split or embedded
+- page text re-split       -> cheap; page hashes report which pages changed
+- chunk id already indexed -> not embedded again (its page number is
+                              updated if the chunk moved to another page)
+- chunk id no longer used  -> its vector is deleted
+
+Chunk ids are derived from (source, chunk text, occurrence), so they stay
+stable when other pages change and new PDFs can be added to an existing
+index without touching the old ones. Sources are keyed on their real path,
+so "data/x.pdf", "./data/x.pdf" and a symlink to it are one source. Pages are split independently, so a
+chunk never spans a page boundary. Changing the splitter settings or the
+embedding model starts a fresh index.
+
+The LangChain files (index.faiss + index.pkl) hold the exact flat index,
+the store of record for adds and deletes. Queries go to a serving index
+built from it in the configured backend (index_backends.py) and saved as
+serving.faiss; both are memory-mapped on load, and the flat index is only
+read into memory when a sync has something to change. Switching backends
+rebuilds serving.faiss from the saved vectors without re-embedding.
+
+A BM25 keyword index over the same chunks (hybrid_search.py) is rebuilt on
+every save, since its idf weights depend on the whole corpus, and saved
+alongside as bm25.npz + bm25.json.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import faiss
+from langchain_community.vectorstores import FAISS
+
+from hybrid_search import BM25Index
+from index_backends import IndexConfig, build_index, factory_string, flat_vectors, read_index
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 3             # v2 keyed sources on the normalized path as given
+FLAT_FILE = "index.faiss"       # written by FAISS.save_local
+SERVING_FILE = "serving.faiss"
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_ids(source: str, chunks: List[str], seen: Counter) -> List[str]:
+    """Stable ids: the same text in the same source keeps its id; repeats get a counter."""
+    ids = []
+    for chunk in chunks:
+        occurrence = seen[chunk]
+        seen[chunk] += 1
+        ids.append(text_sha256(f"{source}\0{chunk}\0{occurrence}")[:32])
+    return ids
+
+
+@dataclass
+class SyncReport:
+    source: str
+    pages: int = 0
+    pages_changed: int = 0
+    chunks_added: int = 0
+    chunks_removed: int = 0
+    unchanged: bool = False
+
+    def __str__(self) -> str:
+        if self.unchanged:
+            return f"{self.source}: unchanged"
+        return (
+            f"{self.source}: {self.pages_changed}/{self.pages} pages changed, "
+            f"+{self.chunks_added} / -{self.chunks_removed} chunks"
+        )
+
+
+class IncrementalIndex:
+    """A FAISS store plus the manifest needed to update it incrementally."""
+
+    def __init__(
+        self,
+        index_dir: str,
+        embeddings: Any,
+        settings: Dict[str, Any],
+        index_config: Optional[IndexConfig] = None,
+    ):
+        self.index_dir = index_dir
+        self.embeddings = embeddings
+        self.settings = settings
+        self.index_config = index_config or IndexConfig()
+        self.vectorstore: Optional[FAISS] = None
+        self.bm25: Optional[BM25Index] = None
+        self.sources: Dict[str, Dict[str, Any]] = {}
+        self.changed = False  # anything save() would write differently
+        self._flat: Optional[faiss.Index] = None  # in-memory store of record, loaded on first change
+        self._load()
+
+    # =========================
+    # Persistence
+    # =========================
+    def _load(self) -> None:
+        try:
+            with open(os.path.join(self.index_dir, MANIFEST_FILE), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("settings") != self.settings:
+            print("Index settings changed; rebuilding from scratch")
+            return
+        if manifest["sources"]:
+            try:
+                # Only ever loads the pickle we wrote ourselves
+                with open(os.path.join(self.index_dir, "index.pkl"), "rb") as f:
+                    docstore, index_to_docstore_id = pickle.load(f)
+                flat = read_index(os.path.join(self.index_dir, FLAT_FILE), self.index_config)
+                self.vectorstore = FAISS(self.embeddings, flat, docstore, index_to_docstore_id)
+                expected = factory_string(self.index_config, flat.d, flat.ntotal)
+                if expected == "Flat":
+                    pass  # serve the flat index itself
+                elif manifest.get("serving") == expected:
+                    self.vectorstore.index = read_index(
+                        os.path.join(self.index_dir, SERVING_FILE), self.index_config
+                    )
+                else:
+                    print(f"Index backend changed to {expected}; rebuilding it from the saved vectors")
+                    self.changed = True
+                self.bm25 = BM25Index.load(self.index_dir)
+                if self.bm25 is None or len(self.bm25.ids) != len(index_to_docstore_id):
+                    print("Keyword index missing or stale; rebuilding it")
+                    self.bm25 = None
+                    self.changed = True
+            except Exception as e:  # corrupt or partial index: rebuild
+                print(f"Saved index unusable ({e}); rebuilding")
+                self.vectorstore = self.bm25 = None
+                self.changed = False
+                return
+        self.sources = manifest["sources"]
+        print(f"Loaded saved index from {self.index_dir}")
+
+    def _writable(self) -> FAISS:
+        """Point the store at the in-memory flat index so adds and deletes work."""
+        if self._flat is None:
+            self._flat = faiss.read_index(os.path.join(self.index_dir, FLAT_FILE))
+        self.vectorstore.index = self._flat
+        return self.vectorstore
+
+    def save(self) -> None:
+        """Write index + manifest to a temp dir and swap it in, so a crash never leaves a half-written index."""
+        tmp_dir = self.index_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        manifest = {"version": MANIFEST_VERSION, "settings": self.settings, "sources": self.sources}
+        if self.vectorstore is not None:
+            flat = self._writable().index
+            self.vectorstore.save_local(tmp_dir)
+            if self.bm25 is None:
+                self.bm25 = BM25Index.from_vectorstore(self.vectorstore)
+            self.bm25.save(tmp_dir)
+            serving = factory_string(self.index_config, flat.d, flat.ntotal)
+            if serving != "Flat":
+                faiss.write_index(
+                    build_index(self.index_config, flat_vectors(flat)), os.path.join(tmp_dir, SERVING_FILE)
+                )
+                manifest["serving"] = serving
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+        os.replace(tmp_dir, self.index_dir)
+        self.changed = False
+        if self.vectorstore is not None:
+            # Serve from the mapped files; the flat copy is re-read if a later sync changes something
+            self._flat = None
+            serving_path = os.path.join(self.index_dir, SERVING_FILE if "serving" in manifest else FLAT_FILE)
+            self.vectorstore.index = read_index(serving_path, self.index_config)
+
+    # =========================
+    # Updates
+    # =========================
+    def _indexed_ids(self) -> set:
+        return {cid for src in self.sources.values() for page in src["pages"] for cid in page["chunks"]}
+
+    def _add(self, texts: List[str], metadatas: List[Dict[str, Any]], ids: List[str]) -> None:
+        if not texts:
+            return
+        self.changed = True
+        self.bm25 = None
+        if self.vectorstore is None:
+            self.vectorstore = FAISS.from_texts(texts, self.embeddings, metadatas=metadatas, ids=ids)
+            self._flat = self.vectorstore.index
+        else:
+            self._writable().add_texts(texts, metadatas=metadatas, ids=ids)
+
+    def _delete(self, ids: List[str]) -> None:
+        if ids and self.vectorstore is not None:
+            self.changed = True
+            self.bm25 = None
+            self._writable().delete(ids)
+
+    def sync(
+        self,
+        path: str,
+        load_pages: Callable[[str], List[str]],
+        split: Callable[[str], List[str]],
+    ) -> SyncReport:
+        """Bring the index in line with the current contents of the file at `path`."""
+        source = os.path.realpath(path)
+        report = SyncReport(source)
+        file_hash = file_sha256(path)
+        previous = self.sources.get(source)
+        if previous and previous["sha256"] == file_hash:
+            report.pages = len(previous["pages"])
+            report.unchanged = True
+            return report
+
+        old_pages = {page["hash"]: page["chunks"] for page in (previous or {}).get("pages", [])}
+        old_ids = {cid for ids in old_pages.values() for cid in ids}
+        old_page_numbers = {
+            cid: number for number, page in enumerate((previous or {}).get("pages", []), start=1)
+            for cid in page["chunks"]
+        }
+        indexed = self._indexed_ids()
+
+        pages, seen = [], Counter()
+        texts, metadatas, new_ids = [], [], []
+        for number, page_text in enumerate(load_pages(path), start=1):
+            page_hash = text_sha256(page_text)
+            chunks = split(page_text)
+            ids = chunk_ids(source, chunks, seen)
+            if page_hash not in old_pages:
+                report.pages_changed += 1
+            for chunk, cid in zip(chunks, ids):
+                if cid not in indexed:
+                    texts.append(chunk)
+                    metadatas.append({"source": source, "page": number})
+                    new_ids.append(cid)
+                elif old_page_numbers.get(cid, number) != number:
+                    # Unchanged text on a shifted page: keep the vector, fix the citation
+                    self.vectorstore.docstore.search(cid).metadata["page"] = number
+            pages.append({"hash": page_hash, "chunks": ids})
+
+        current_ids = {cid for page in pages for cid in page["chunks"]}
+        removed = sorted(old_ids - current_ids)
+        self._delete(removed)
+        self._add(texts, metadatas, new_ids)
+
+        self.sources[source] = {"sha256": file_hash, "pages": pages}
+        self.changed = True
+        report.pages = len(pages)
+        report.chunks_added = len(new_ids)
+        report.chunks_removed = len(removed)
+        return report
+
+    def remove_source(self, path: str) -> int:
+        """Drop a source and all its vectors; returns the number of chunks removed."""
+        source = self.sources.pop(os.path.realpath(path), None)
+        if source is None:
+            return 0
+        self.changed = True
+        ids = [cid for page in source["pages"] for cid in page["chunks"]]
+        self._delete(ids)
+        return len(ids)